@@ -0,0 +1,270 @@
+# OthelloAnalysis.py
+#
+# This is the board analysis, which keeps the stable discs, frontier discs and potential mobility of a board
+# up to date as pieces are placed on it
+#
+# The analysis listens to the board, so every place_piece, whether it is a move, a flip or an undo, updates
+# the counts of the places around it. The stable discs are worked out from the bits of the pieces and the
+# masks of the full lines only when they are asked for after a change.
+#
+import functools
+
+import OthelloBitboard
+import OthelloGameLogic
+
+# For each of the four lines through a place, the indexes of its two directions in OthelloBitboard.shifts
+_AXES = [(3, 4), (1, 6), (0, 7), (2, 5)]
+
+
+def _shifted(bits: int, shift: int, mask: int) -> int:
+    """
+    :return: The bits moved one step in the direction of the shift and mask from OthelloBitboard.shifts
+    """
+    if shift > 0:
+        return (bits << shift) & mask
+    return (bits >> -shift) & mask
+
+
+class _BoardLines:
+    """
+    The lines of a board size, worked out once for each size
+    """
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        self.full = OthelloBitboard.full_mask(rows, columns)
+        self.shifts = OthelloBitboard.shifts(rows, columns)
+
+        # The indexes of the places next to each place
+        geometry = OthelloGameLogic.board_geometry(rows, columns)
+        self.neighbours = [tuple(row * columns + column for row, column in geometry.neighbours[place])
+                           for place in geometry.places]
+
+        # The places whose next place in each direction is off the board. A place is next to the places that
+        # are one step back from it in the direction, so the places that are not are on the edge
+        opposite = len(self.shifts) - 1
+        self.edges = [self.full & ~_shifted(self.full, *self.shifts[opposite - direction])
+                      for direction in range(len(self.shifts))]
+
+        # Every line of each axis, as the mask of its places, and the line of each axis through each place
+        self.line_masks = []
+        self.line_lengths = []
+        self.place_lines = [[None] * len(_AXES) for _ in range(rows * columns)]
+        for axis, (row_difference, column_difference) in enumerate([(0, 1), (1, 0), (1, 1), (1, -1)]):
+            for row, column in geometry.places:
+                before_row, before_column = row - row_difference, column - column_difference
+                if 0 <= before_row < rows and 0 <= before_column < columns:
+                    continue  # The line was started at a place before this one
+                line = len(self.line_masks)
+                mask = 0
+                length = 0
+                while 0 <= row < rows and 0 <= column < columns:
+                    mask |= 1 << (row * columns + column)
+                    length += 1
+                    self.place_lines[row * columns + column][axis] = line
+                    row += row_difference
+                    column += column_difference
+                self.line_masks.append(mask)
+                self.line_lengths.append(length)
+
+
+@functools.lru_cache(maxsize=None)
+def board_lines(rows: int, columns: int) -> _BoardLines:
+    """
+    :return: The lines of the board size, which are only made once for each size
+    """
+    return _BoardLines(rows, columns)
+
+
+class BoardAnalysis:
+    def __init__(self, board, rule: str = 'FULL'):
+        """
+        The analysis of a board, which is kept up to date as pieces are placed until it is detached
+        :param board: The game board, of any backend
+        :param rule: SIMPLE or FULL, which changes what a stable disc is
+        """
+        self.board = board
+        self.rule = rule
+        self._lines = board_lines(board.rows, board.columns)
+        self.board_reset()
+        board.listeners.append(self)
+
+    def detach(self) -> None:
+        """ Stop following the changes of the board """
+        self.board.listeners.remove(self)
+
+    def board_reset(self) -> None:
+        """ Work out every count again from the pieces of the board """
+        lines = self._lines
+        self.black = 0
+        self.white = 0
+        self._line_counts = [0] * len(lines.line_masks)
+        self._full_axes = [0] * len(_AXES)  # For each axis, the places whose line of that axis is full
+        self._empty_neighbours = [len(neighbours) for neighbours in lines.neighbours]
+        self._adjacent = {OthelloGameLogic.BLACK: [0] * len(lines.neighbours),
+                          OthelloGameLogic.WHITE: [0] * len(lines.neighbours)}
+        self._frontier = {OthelloGameLogic.BLACK: 0, OthelloGameLogic.WHITE: 0}
+        self._empty_next_to = {OthelloGameLogic.BLACK: 0, OthelloGameLogic.WHITE: 0}
+        self._stable = None
+
+        for index in range(lines.rows * lines.columns):
+            color = self.board.get_color(divmod(index, lines.columns))
+            if color != OthelloGameLogic.NONE:
+                self.piece_placed(divmod(index, lines.columns), OthelloGameLogic.NONE, color)
+
+    def _color_of(self, index: int) -> int:
+        bit = 1 << index
+        if self.black & bit:
+            return OthelloGameLogic.BLACK
+        elif self.white & bit:
+            return OthelloGameLogic.WHITE
+        return OthelloGameLogic.NONE
+
+    def piece_placed(self, place: tuple, before_color: int, color: int) -> None:
+        """
+        Update the counts of the place and the places around it
+        :param place: The place that changed
+        :param before_color: The color of the place before
+        :param color: The color of the place now
+        """
+        if before_color == color:
+            return
+        lines = self._lines
+        row, column = place
+        index = row * lines.columns + column
+        bit = 1 << index
+        neighbours = lines.neighbours[index]
+        self._stable = None
+
+        if before_color == OthelloGameLogic.BLACK:
+            self.black ^= bit
+        elif before_color == OthelloGameLogic.WHITE:
+            self.white ^= bit
+        if color == OthelloGameLogic.BLACK:
+            self.black |= bit
+        elif color == OthelloGameLogic.WHITE:
+            self.white |= bit
+
+        if before_color == OthelloGameLogic.NONE:
+            # The place is taken, so it is no longer next to the colors and the places around it lose an empty
+            for adjacent_color, adjacent in self._adjacent.items():
+                if adjacent[index]:
+                    self._empty_next_to[adjacent_color] -= 1
+            for axis, line in enumerate(lines.place_lines[index]):
+                self._line_counts[line] += 1
+                if self._line_counts[line] == lines.line_lengths[line]:
+                    self._full_axes[axis] |= lines.line_masks[line]
+            for neighbour in neighbours:
+                self._empty_neighbours[neighbour] -= 1
+                if self._empty_neighbours[neighbour] == 0:
+                    neighbour_color = self._color_of(neighbour)
+                    if neighbour_color != OthelloGameLogic.NONE:
+                        self._frontier[neighbour_color] -= 1
+            if self._empty_neighbours[index]:
+                self._frontier[color] += 1
+        elif color == OthelloGameLogic.NONE:
+            # The place is emptied, which is the other way around
+            for adjacent_color, adjacent in self._adjacent.items():
+                if adjacent[index]:
+                    self._empty_next_to[adjacent_color] += 1
+            for axis, line in enumerate(lines.place_lines[index]):
+                if self._line_counts[line] == lines.line_lengths[line]:
+                    self._full_axes[axis] &= ~lines.line_masks[line]
+                self._line_counts[line] -= 1
+            for neighbour in neighbours:
+                self._empty_neighbours[neighbour] += 1
+                if self._empty_neighbours[neighbour] == 1:
+                    neighbour_color = self._color_of(neighbour)
+                    if neighbour_color != OthelloGameLogic.NONE:
+                        self._frontier[neighbour_color] += 1
+            if self._empty_neighbours[index]:
+                self._frontier[before_color] -= 1
+        elif self._empty_neighbours[index]:
+            # The disc is flipped
+            self._frontier[before_color] -= 1
+            self._frontier[color] += 1
+
+        if before_color != OthelloGameLogic.NONE:
+            adjacent = self._adjacent[before_color]
+            for neighbour in neighbours:
+                adjacent[neighbour] -= 1
+                if adjacent[neighbour] == 0 and not (self.black | self.white) >> neighbour & 1:
+                    self._empty_next_to[before_color] -= 1
+        if color != OthelloGameLogic.NONE:
+            adjacent = self._adjacent[color]
+            for neighbour in neighbours:
+                adjacent[neighbour] += 1
+                if adjacent[neighbour] == 1 and not (self.black | self.white) >> neighbour & 1:
+                    self._empty_next_to[color] += 1
+
+    def color_bits(self, color: int) -> int:
+        if color == OthelloGameLogic.BLACK:
+            return self.black
+        return self.white
+
+    def frontier_discs(self, color: int) -> int:
+        """
+        :return: Number of discs of the color next to an empty place
+        """
+        return self._frontier[color]
+
+    def potential_mobility(self, color: int) -> int:
+        """
+        :return: Number of empty places next to a disc of the other color, where the color may move later
+        """
+        return self._empty_next_to[OthelloGameLogic.BLACK + OthelloGameLogic.WHITE - color]
+
+    def stable_bits(self, color: int) -> int:
+        """
+        The discs of the color that can never be flipped. In the full rule, a disc is stable when along each
+        of the four lines through it, the line is full, or the next place on one side is off the board or a
+        stable disc of the same color. In the simple rule, a disc is stable when it has no empty place next
+        to it
+        :return: Bits of the stable discs
+        """
+        if self._stable is None:
+            self._stable = {OthelloGameLogic.BLACK: self._find_stable(self.black),
+                            OthelloGameLogic.WHITE: self._find_stable(self.white)}
+        return self._stable[color]
+
+    def stable_discs(self, color: int) -> int:
+        """
+        :return: Number of stable discs of the color
+        """
+        return OthelloBitboard.popcount(self.stable_bits(color))
+
+    def _find_stable(self, discs: int) -> int:
+        lines = self._lines
+        if self.rule == 'SIMPLE':
+            empty = lines.full & ~(self.black | self.white)
+            return discs & ~OthelloBitboard.neighbour_bits(empty, lines.rows, lines.columns)
+
+        # Places where each axis is safe without any stable disc, then stable discs are added until there are
+        # no more
+        safe = [self._full_axes[axis] | lines.edges[first] | lines.edges[second]
+                for axis, (first, second) in enumerate(_AXES)]
+        last = len(lines.shifts) - 1
+        stable = 0
+        while True:
+            found = discs
+            for axis, (first, second) in enumerate(_AXES):
+                # The places whose next place in the direction is stable are one step back from the stable discs
+                found &= safe[axis] | _shifted(stable, *lines.shifts[last - first]) | \
+                    _shifted(stable, *lines.shifts[last - second])
+                if not found:
+                    break
+            if found == stable:
+                return stable
+            stable = found
+
+    def features(self, color: int) -> dict:
+        """
+        :return: The stable discs, frontier discs and potential mobility of the color, less those of the
+        other color
+        """
+        other = OthelloGameLogic.BLACK + OthelloGameLogic.WHITE - color
+        return {
+            'stable': self.stable_discs(color) - self.stable_discs(other),
+            'frontier': self.frontier_discs(color) - self.frontier_discs(other),
+            'potential_mobility': self.potential_mobility(color) - self.potential_mobility(other),
+        }
@@ -0,0 +1,191 @@
+# OthelloBatchEval.py
+#
+# This is the batch evaluation, which works out the features and the evaluation of many positions at once
+# with NumPy. The positions are (N, rows, columns) int8 arrays of the colors, like the boards of self-play.
+#
+# Every feature is for the color of the turn of each position, the count of that color less the count of
+# the other color.
+#
+import functools
+
+import numpy
+
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+from OthelloSelfPlay import OTHER, possible_moves, shifted_cells
+
+_AXES = [((0, 1), (0, -1)), ((1, 0), (-1, 0)), ((1, 1), (-1, -1)), ((1, -1), (-1, 1))]
+
+# Weight of each feature in the evaluation
+WEIGHTS = {
+    'mobility': 5,
+    'frontier': -3,
+    'stable': 20,
+    'corners': 30,
+    'edges': 2,
+    'squares': 1,
+}
+
+
+def pack_boards(boards: list) -> numpy.ndarray:
+    """
+    :param boards: Game boards of the same size, of any backend
+    :return: (N, rows, columns) int8 array of the colors
+    """
+    rows, columns = boards[0].rows, boards[0].columns
+    packed = numpy.empty((len(boards), rows, columns), dtype=numpy.int8)
+    for index, board in enumerate(boards):
+        if isinstance(board, OthelloGameLogic.CompactGameBoard):
+            packed[index] = numpy.frombuffer(board.board, dtype=numpy.int8).reshape(rows, columns)
+        else:
+            packed[index] = [[board.get_color((row, column)) for column in range(columns)] for row in range(rows)]
+    return packed
+
+
+@functools.lru_cache(maxsize=None)
+def square_weights(rows: int, columns: int) -> numpy.ndarray:
+    """
+    The weight of each place, high for the corners and the edges and low for the places next to the corners,
+    which give the corners away. Only made once for each size
+    :return: (rows, columns) int array
+    """
+    weights = numpy.ones((rows, columns), dtype=numpy.int32)
+    weights[[0, -1], :] = 10
+    weights[:, [0, -1]] = 10
+    weights[[1, -2], 1:-1] = -2
+    weights[1:-1, [1, -2]] = -2
+    for corner_row, corner_column, row_step, column_step in ((0, 0, 1, 1), (0, columns - 1, 1, -1),
+                                                             (rows - 1, 0, -1, 1), (rows - 1, columns - 1, -1, -1)):
+        weights[corner_row, corner_column] = 100
+        weights[corner_row + row_step, corner_column] = -20
+        weights[corner_row, corner_column + column_step] = -20
+        weights[corner_row + row_step, corner_column + column_step] = -50
+    weights.flags.writeable = False
+    return weights
+
+
+def _difference(cells: numpy.ndarray, own: numpy.ndarray, opponent: numpy.ndarray) -> numpy.ndarray:
+    """
+    :return: (N,) array of the cells that are own less the cells that are the opponent's
+    """
+    return (cells & own).sum(axis=(1, 2)) - (cells & opponent).sum(axis=(1, 2))
+
+
+def _inside(cells: numpy.ndarray, row_difference: int, column_difference: int) -> numpy.ndarray:
+    """
+    Like shifted_cells by one step, but True outside the board
+    """
+    return ~shifted_cells(~cells, row_difference, column_difference, 1)
+
+
+def frontier_discs(boards: numpy.ndarray) -> numpy.ndarray:
+    """
+    :return: (N, rows, columns) bool array of the discs next to an empty place
+    """
+    empty = boards == OthelloGameLogic.NONE
+    near_empty = numpy.zeros_like(empty)
+    for row_difference, column_difference in OthelloGameLogic.DIRECTIONS:
+        near_empty |= shifted_cells(empty, row_difference, column_difference, 1)
+    return near_empty & ~empty
+
+
+def stable_discs(boards: numpy.ndarray, rule: str) -> numpy.ndarray:
+    """
+    The discs that can never be flipped. In the full rule, a disc is stable when along each of the four lines
+    through it, the line is full, or the next place on one side is off the board or a stable disc of the
+    same color. In the simple rule, a disc is stable when it has no empty place next to it
+    :return: (N, rows, columns) bool array
+    """
+    empty = boards == OthelloGameLogic.NONE
+    if rule == 'SIMPLE':
+        return ~empty & ~frontier_discs(boards)
+
+    # For each direction, the places where every place from the next one to the edge of the board is taken
+    longest = max(boards.shape[1:])
+    filled = {}
+    for row_difference, column_difference in OthelloGameLogic.DIRECTIONS:
+        taken = numpy.ones_like(empty)
+        for _ in range(longest):
+            taken = _inside(taken & ~empty, row_difference, column_difference)
+        filled[(row_difference, column_difference)] = taken
+
+    full_axes = [filled[forward] & filled[backward] for forward, backward in _AXES]
+    stable = numpy.zeros_like(empty)
+    for color in (OthelloGameLogic.BLACK, OthelloGameLogic.WHITE):
+        discs = boards == color
+        color_stable = numpy.zeros_like(empty)
+        while True:
+            grown = discs.copy()
+            for (forward, backward), full in zip(_AXES, full_axes):
+                grown &= full | _inside(color_stable, *forward) | _inside(color_stable, *backward)
+            if numpy.array_equal(grown, color_stable):
+                break
+            color_stable = grown
+        stable |= color_stable
+    return stable
+
+
+def features(boards: numpy.ndarray, turns: numpy.ndarray, rule: str) -> dict:
+    """
+    The features of every position
+    :param boards: (N, rows, columns) int8 array of the colors
+    :param turns: (N,) array of the color of the turn
+    :param rule: SIMPLE or FULL
+    :return: Dictionary of each feature to its (N,) int array
+    """
+    turns = numpy.asarray(turns, dtype=numpy.int8)
+    _, rows, columns = boards.shape
+    own = boards == turns[:, None, None]
+    opponent = boards == (OTHER - turns)[:, None, None]
+
+    corners = numpy.zeros((rows, columns), dtype=bool)
+    corners[[0, 0, -1, -1], [0, -1, 0, -1]] = True
+    edges = numpy.zeros((rows, columns), dtype=bool)
+    edges[[0, -1], :] = True
+    edges[:, [0, -1]] = True
+    edges &= ~corners
+
+    weights = square_weights(rows, columns)
+    return {
+        'mobility': possible_moves(boards, turns, rule).sum(axis=(1, 2))
+        - possible_moves(boards, OTHER - turns, rule).sum(axis=(1, 2)),
+        'frontier': _difference(frontier_discs(boards), own, opponent),
+        'stable': _difference(stable_discs(boards, rule), own, opponent),
+        'corners': _difference(corners[None], own, opponent),
+        'edges': _difference(edges[None], own, opponent),
+        'squares': (own * weights).sum(axis=(1, 2)) - (opponent * weights).sum(axis=(1, 2)),
+    }
+
+
+def evaluate(boards: numpy.ndarray, turns: numpy.ndarray, rule: str, winning_condition: str = '>',
+             weights: dict = None) -> numpy.ndarray:
+    """
+    The evaluation of every position, the features added up by their weights
+    :param weights: Weight of each feature, WEIGHTS if None
+    :return: (N,) int array, bigger is better for the turn
+    """
+    weights = WEIGHTS if weights is None else weights
+    score = numpy.zeros(len(boards), dtype=numpy.int64)
+    for name, values in features(boards, turns, rule).items():
+        score += weights.get(name, 0) * values
+    if winning_condition == '<':
+        score = -score
+    return score
+
+
+def evaluate_moves(game_state: GameState, moves: list, weights: dict = None) -> numpy.ndarray:
+    """
+    Evaluate the position after each of the moves in one batch
+    :param game_state: The Othello Game State, which is not changed
+    :param moves: Possible moves of the game state
+    :return: (N,) int array of the evaluation of each move, bigger is better for the player making it
+    """
+    boards = []
+    for move in moves:
+        record = game_state.make_move(move)
+        boards.append(pack_boards([game_state.board])[0])
+        game_state.unmake_move(record)
+    turns = numpy.full(len(moves), game_state.turn, dtype=numpy.int8)
+    return evaluate(numpy.array(boards, dtype=numpy.int8).reshape(len(moves), game_state.board.rows,
+                                                                   game_state.board.columns),
+                    turns, game_state.rule, game_state.winning_condition, weights)
@@ -0,0 +1,327 @@
+# OthelloBitboard.py
+#
+# This is the bitboard version of the game board, where every position is stored as two integers
+#
+import functools
+
+import OthelloGameLogic
+import OthelloZobrist
+
+
+@functools.lru_cache(maxsize=None)
+def shifts(rows: int, columns: int) -> ((int, int),):
+    """
+    The shift amount and the mask for each of the 8 directions on a board of this size.
+    The cell (row, column) is the bit row * columns + column, so moving one step in a direction
+    is a shift, and the mask removes the bits that fell off the board or wrapped around a side
+    :param rows: Rows of the board
+    :param columns: Columns of the board
+    :return: Tuple of (shift, mask) for each direction
+    """
+    full = (1 << (rows * columns)) - 1
+    first_column = 0
+    last_column = 0
+    for row in range(rows):
+        first_column |= 1 << (row * columns)
+        last_column |= 1 << (row * columns + columns - 1)
+
+    result = []
+    for row_difference, column_difference in OthelloGameLogic.DIRECTIONS:
+        mask = full
+        if column_difference == 1:
+            mask &= ~first_column
+        elif column_difference == -1:
+            mask &= ~last_column
+        result.append((row_difference * columns + column_difference, mask))
+    return tuple(result)
+
+
+def full_mask(rows: int, columns: int) -> int:
+    """
+    :return: The mask with every cell of the board set
+    """
+    return (1 << (rows * columns)) - 1
+
+
+def popcount(bits: int) -> int:
+    """
+    :return: Number of cells set in the bits
+    """
+    return bin(bits).count('1')
+
+
+def bit_of(place: tuple, columns: int) -> int:
+    """
+    :param place: The (row, column) of the cell
+    :param columns: Columns of the board
+    :return: The bit of the cell
+    """
+    row, column = place
+    return 1 << (row * columns + column)
+
+
+def places_of(bits: int, columns: int) -> {tuple}:
+    """
+    :param bits: Cells of the board
+    :param columns: Columns of the board
+    :return: Set of (row, column) of every cell in the bits
+    """
+    result = set()
+    while bits:
+        lowest = bits & -bits
+        result.add(divmod(lowest.bit_length() - 1, columns))
+        bits ^= lowest
+    return result
+
+
+def neighbour_bits(bits: int, rows: int, columns: int) -> int:
+    """
+    :return: Every cell next to one of the cells in the bits
+    """
+    result = 0
+    for shift, mask in shifts(rows, columns):
+        if shift > 0:
+            result |= (bits << shift) & mask
+        else:
+            result |= (bits >> -shift) & mask
+    return result
+
+
+def simple_moves(own: int, opponent: int, rows: int, columns: int) -> int:
+    """
+    Possible moves of simple rules, which are the empty cells next to an opponent piece
+    :param own: Pieces of the player moving
+    :param opponent: Pieces of the other player
+    :return: Bits of the possible moves
+    """
+    empty = ~(own | opponent) & full_mask(rows, columns)
+    return neighbour_bits(opponent, rows, columns) & empty
+
+
+def full_moves(own: int, opponent: int, rows: int, columns: int) -> int:
+    """
+    Possible moves of full Othello rules, which are the empty cells that would flip at least one line
+    :param own: Pieces of the player moving
+    :param opponent: Pieces of the other player
+    :return: Bits of the possible moves
+    """
+    empty = ~(own | opponent) & full_mask(rows, columns)
+    steps = max(rows, columns) - 3  # The longest line of opponent pieces that can be flipped, minus the first
+    moves = 0
+    for shift, mask in shifts(rows, columns):
+        if shift > 0:
+            line = (own << shift) & mask & opponent
+            for _ in range(steps):
+                line |= (line << shift) & mask & opponent
+            moves |= (line << shift) & mask & empty
+        else:
+            shift = -shift
+            line = (own >> shift) & mask & opponent
+            for _ in range(steps):
+                line |= (line >> shift) & mask & opponent
+            moves |= (line >> shift) & mask & empty
+    return moves
+
+
+def full_flips(own: int, opponent: int, move: int, rows: int, columns: int) -> int:
+    """
+    Pieces flipped by a move in the full Othello rules
+    :param own: Pieces of the player moving
+    :param opponent: Pieces of the other player
+    :param move: Bit of the move
+    :return: Bits of the flipped pieces
+    """
+    flips = 0
+    for shift, mask in shifts(rows, columns):
+        line = 0
+        if shift > 0:
+            testing = (move << shift) & mask
+            while testing & opponent:
+                line |= testing
+                testing = (testing << shift) & mask
+        else:
+            shift = -shift
+            testing = (move >> shift) & mask
+            while testing & opponent:
+                line |= testing
+                testing = (testing >> shift) & mask
+        if testing & own:
+            flips |= line
+    return flips
+
+
+# Tables that turn the color bytes of a compact board into digits, BLACK = 1 and WHITE = 2 are written out
+# because the game logic is not loaded yet when this module is
+_BLACK_DIGITS = bytes(ord('1') if color == 1 else ord('0') for color in range(256))
+_WHITE_DIGITS = bytes(ord('1') if color == 2 else ord('0') for color in range(256))
+
+
+def board_bits(board) -> (int, int):
+    """
+    The black and white bits of any game board
+    :param board: GameBoard or BitBoard
+    :return: Tuple of the black bits and the white bits
+    """
+    if isinstance(board, BitBoard):
+        return board.black, board.white
+    if isinstance(board, OthelloGameLogic.CompactGameBoard):
+        # The bytes of the colors become a string of 0 and 1 for each color, last place first
+        colors = bytes(board.board[::-1])
+        return int(colors.translate(_BLACK_DIGITS), 2), int(colors.translate(_WHITE_DIGITS), 2)
+
+    black = 0
+    white = 0
+    for piece in board.list_of_pieces():
+        if piece.color == OthelloGameLogic.BLACK:
+            black |= bit_of(piece.location, board.columns)
+        elif piece.color == OthelloGameLogic.WHITE:
+            white |= bit_of(piece.location, board.columns)
+    return black, white
+
+
+class BitBoard:
+    """
+    This is the board of the Othello Game State, kept as one integer for the black pieces and one
+    for the white pieces
+    """
+    def __init__(self, top_left_disc_color: str, rows: int, columns: int):
+        self._top_left_disc_color = top_left_disc_color
+        self.rows = rows
+        self.columns = columns
+        self.black = 0
+        self.white = 0
+        self.hash_key = 0  # Zobrist key of the pieces, kept up to date by place_piece
+        self.listeners = []  # Objects told about every change of the board, like the listeners of GameBoard
+        self._new_game_board()
+
+    def _new_game_board(self) -> None:
+        """ Place the four starting pieces the same way GameBoard does """
+        if self._top_left_disc_color == 'B':
+            diagonal1, diagonal2 = OthelloGameLogic.BLACK, OthelloGameLogic.WHITE
+        else:
+            diagonal1, diagonal2 = OthelloGameLogic.WHITE, OthelloGameLogic.BLACK
+
+        top, left = self.rows // 2 - 1, self.columns // 2 - 1
+        self.place_piece((top, left), diagonal1)
+        self.place_piece((top, left + 1), diagonal2)
+        self.place_piece((top + 1, left), diagonal2)
+        self.place_piece((top + 1, left + 1), diagonal1)
+
+    @property
+    def black_disc(self) -> int:
+        return popcount(self.black)
+
+    @property
+    def white_disc(self) -> int:
+        return popcount(self.white)
+
+    def color_bits(self, color: int) -> int:
+        """
+        :param color: BLACK or WHITE
+        :return: The bits of the pieces of the color
+        """
+        if color == OthelloGameLogic.BLACK:
+            return self.black
+        else:
+            return self.white
+
+    def place_piece(self, place: tuple, color: int) -> None:
+        """
+        Place piece on the board
+        :param place: Place on the board
+        :param color: Color of piece to placed on the board
+        """
+        index = OthelloZobrist.cell_index(place)
+        before_piece_color = self.get_color(place)
+        self.hash_key ^= OthelloZobrist.PIECE_KEYS[before_piece_color][index] ^ OthelloZobrist.PIECE_KEYS[color][index]
+
+        bit = bit_of(place, self.columns)
+        self.black &= ~bit
+        self.white &= ~bit
+        if color == OthelloGameLogic.BLACK:
+            self.black |= bit
+        elif color == OthelloGameLogic.WHITE:
+            self.white |= bit
+        for listener in self.listeners:
+            listener.piece_placed(place, before_piece_color, color)
+
+    def set_bits(self, black: int, white: int) -> None:
+        """
+        Put the pieces of the bits on the board, in place of every piece that was there. The listeners are
+        told about it with board_reset()
+        :param black: Bits of the black pieces
+        :param white: Bits of the white pieces
+        """
+        self.black = black
+        self.white = white
+        self.hash_key = 0
+        for color, bits in ((OthelloGameLogic.BLACK, black), (OthelloGameLogic.WHITE, white)):
+            keys = OthelloZobrist.PIECE_KEYS[color]
+            while bits:
+                lowest = bits & -bits
+                self.hash_key ^= keys[OthelloZobrist.cell_index(divmod(lowest.bit_length() - 1, self.columns))]
+                bits ^= lowest
+        for listener in self.listeners:
+            listener.board_reset()
+
+    def get_color(self, place: tuple) -> int:
+        bit = bit_of(place, self.columns)
+        if self.black & bit:
+            return OthelloGameLogic.BLACK
+        elif self.white & bit:
+            return OthelloGameLogic.WHITE
+        else:
+            return OthelloGameLogic.NONE
+
+    def get_piece(self, place: tuple) -> 'OthelloGameLogic.Piece':
+        row, column = place
+        return OthelloGameLogic.Piece(self.get_color(place), (row, column))
+
+    def list_of_pieces(self) -> ['OthelloGameLogic.Piece']:
+        return [self.get_piece((row, column)) for row in range(self.rows) for column in range(self.columns)]
+
+    def simple_possible_moves(self, color: int) -> {tuple}:
+        """
+        :param color: Color of the player moving
+        :return: Possible moves of simple rules
+        """
+        own, opponent = self._own_and_opponent(color)
+        return places_of(simple_moves(own, opponent, self.rows, self.columns), self.columns)
+
+    def full_possible_moves(self, color: int) -> {tuple}:
+        """
+        :param color: Color of the player moving
+        :return: Possible moves of full Othello rules
+        """
+        own, opponent = self._own_and_opponent(color)
+        return places_of(full_moves(own, opponent, self.rows, self.columns), self.columns)
+
+    def is_simple_move(self, move: tuple, color: int) -> bool:
+        """
+        :param move: The move
+        :param color: Color of the player moving
+        :return: Whether the move is possible in simple rules
+        """
+        own, opponent = self._own_and_opponent(color)
+        bit = bit_of(move, self.columns)
+        if (own | opponent) & bit:
+            return False
+        return bool(neighbour_bits(bit, self.rows, self.columns) & opponent)
+
+    def full_flipped_places(self, move: tuple, color: int) -> [tuple]:
+        """
+        :param move: The move
+        :param color: Color of the player moving
+        :return: Places flipped by the move in full Othello rules, empty if the move is not possible
+        """
+        own, opponent = self._own_and_opponent(color)
+        bit = bit_of(move, self.columns)
+        if (own | opponent) & bit:
+            return []
+        return list(places_of(full_flips(own, opponent, bit, self.rows, self.columns), self.columns))
+
+    def _own_and_opponent(self, color: int) -> (int, int):
+        if color == OthelloGameLogic.BLACK:
+            return self.black, self.white
+        else:
+            return self.white, self.black
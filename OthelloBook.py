@@ -0,0 +1,202 @@
+# OthelloBook.py
+#
+# This is the opening book, with the builder that learns it from played games and the book that looks it up
+#
+# The book file starts with the 16 byte header, MAGIC, the version, the rule (0 SIMPLE, 1 FULL), rows,
+# columns and the number of entries as a 32 bit little endian number. Each entry is 24 bytes, the Zobrist
+# key of the position from GameState.hash_key(), the move as the byte row * columns + column, and the wins,
+# draws and losses of the player that made the move. The entries are sorted by key, so all of the moves of
+# a position are next to each other.
+#
+# A move-list text file has one game on each line, the moves as row,column starting at 1 like the console,
+# and PASS for a pass. Empty lines and lines starting with # are left out.
+#
+import collections
+import mmap
+import os
+import random
+import struct
+
+import OthelloGameLogic
+from OthelloGameLogic import GameState, InvalidMoveError
+
+MAGIC = b'OTHB'
+VERSION = 1
+MAX_PLY = 20  # Moves of each game that go into the book, counting passes
+
+_HEADER = struct.Struct('<4sBBBBI4x')
+_ENTRY = struct.Struct('<QB3xIII')
+
+_RULES = ['SIMPLE', 'FULL']
+_COLOR_NAMES = {OthelloGameLogic.BLACK: 'BLACK', OthelloGameLogic.WHITE: 'WHITE'}
+
+
+class InvalidBookFile(Exception):
+    """Raises whenever a file is not a book file, or is a book of another board size or rule"""
+    pass
+
+
+def book_path(directory: str, rule: str, rows: int, columns: int) -> str:
+    """
+    :return: The path of the book of the board size and rule in the directory
+    """
+    return os.path.join(directory, 'book_{}_{}x{}.bin'.format(rule, rows, columns))
+
+
+def parse_move_list(line: str) -> [tuple]:
+    """
+    :param line: One game of a move-list text file
+    :return: The moves of the game, None is a pass
+    """
+    moves = []
+    for word in line.split():
+        if word.upper() == 'PASS':
+            moves.append(None)
+        else:
+            row, column = word.split(',')
+            moves.append((int(row) - 1, int(column) - 1))
+    return moves
+
+
+class BookBuilder:
+    def __init__(self, rule: str, rows: int, columns: int, starting_player: str = 'B',
+                 top_left_disc_color: str = 'W', winning_condition: str = '>', max_ply: int = MAX_PLY):
+        """
+        Builder of the book of one board size and rule, from games with the same settings as GameState
+        :param max_ply: Moves of each game that go into the book
+        """
+        self.settings = (rule, rows, columns, starting_player, top_left_disc_color, winning_condition)
+        self.rule = rule
+        self.rows = rows
+        self.columns = columns
+        self.max_ply = max_ply
+        self.games = 0
+        self.rejected = 0  # Games left out because a line could not be read or a move was not possible
+        # For each key, for each move, the wins, draws and losses of the player that made the move
+        self._stats = collections.defaultdict(lambda: collections.defaultdict(lambda: [0, 0, 0]))
+
+    def add_game(self, moves: [tuple]) -> bool:
+        """
+        Replay one game through a game state and count its result for the positions of its first moves
+        :param moves: The moves of the game, None is a pass
+        :return: True if the game was added, False if it is not finished or has a move that is not possible
+        """
+        game_state = GameState(*self.settings)
+        played = []
+        for ply, move in enumerate(moves):
+            game_state.ending_condition_met()  # The turn is passed when the player has no moves
+            if move is None:
+                continue
+            if ply < self.max_ply:
+                played.append((game_state.hash_key(), move, game_state.turn))
+            try:
+                game_state.move(move)
+            except InvalidMoveError:
+                self.rejected += 1
+                return False
+        if not game_state.ending_condition_met():
+            return False
+
+        for key, move, turn in played:
+            counts = self._stats[key][move]
+            if game_state.winner == 'NONE':
+                counts[1] += 1
+            elif game_state.winner == _COLOR_NAMES[turn]:
+                counts[0] += 1
+            else:
+                counts[2] += 1
+        self.games += 1
+        return True
+
+    def add_text_file(self, path: str) -> int:
+        """
+        Add every finished game of a move-list text file, the lines that can not be read are counted in rejected
+        :return: Number of games added
+        """
+        added = 0
+        with open(path) as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    try:
+                        moves = parse_move_list(line)
+                    except ValueError:
+                        self.rejected += 1
+                        continue
+                    added += self.add_game(moves)
+        return added
+
+    def save(self, path: str) -> None:
+        """ Write the book file """
+        entries = sorted((key, move, counts) for key, moves in self._stats.items() for move, counts in moves.items())
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(MAGIC, VERSION, _RULES.index(self.rule), self.rows, self.columns, len(entries)))
+            for key, (row, column), (wins, draws, losses) in entries:
+                file.write(_ENTRY.pack(key, row * self.columns + column, wins, draws, losses))
+
+
+class OpeningBook:
+    def __init__(self, path: str, rule: str = None, rows: int = None, columns: int = None):
+        """
+        The book of a book file. Only the header is read here, the entries are read the first time the book
+        is looked up
+        :param path: Path of the file
+        :param rule: The rule the book has to be for, or None for any
+        :param rows: The rows the book has to be for, or None for any
+        :param columns: The columns the book has to be for, or None for any
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise InvalidBookFile
+        magic, version, rule_index, self.rows, self.columns, self.entries = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or rule_index >= len(_RULES):
+            raise InvalidBookFile
+        self.rule = _RULES[rule_index]
+        if (rule is not None and rule != self.rule) or (rows is not None and rows != self.rows) or \
+                (columns is not None and columns != self.columns):
+            raise InvalidBookFile
+        self._positions = None
+
+    def _load(self) -> dict:
+        """ Read the entries into a dictionary of each key to its moves """
+        positions = collections.defaultdict(list)
+        if self.entries:
+            with open(self.path, 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    for key, code, wins, draws, losses in _ENTRY.iter_unpack(
+                            view[_HEADER.size:_HEADER.size + self.entries * _ENTRY.size]):
+                        positions[key].append((divmod(code, self.columns), wins, draws, losses))
+        return dict(positions)
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def lookup(self, game_state: GameState, min_games: int = 1) -> [tuple]:
+        """
+        The book moves of the position, weighted by the share of the games won by the player that made them,
+        counting a draw as half a win
+        :param game_state: The Othello Game State
+        :param min_games: Games a move needs to be played in to be given
+        :return: List of (move, weight, games), best first, empty when the position is not in the book
+        """
+        if self._positions is None:
+            self._positions = self._load()
+        moves = []
+        for move, wins, draws, losses in self._positions.get(game_state.hash_key(), ()):
+            games = wins + draws + losses
+            if games >= min_games:
+                moves.append((move, (wins + draws / 2) / games, games))
+        moves.sort(key=lambda book_move: (-book_move[1], -book_move[2], book_move[0]))
+        return moves
+
+    def choose(self, game_state: GameState, generator: random.Random = random, min_games: int = 1) -> tuple:
+        """
+        Pick a book move at random, in proportion to the weights
+        :return: The move, or None when the position is not in the book
+        """
+        moves = self.lookup(game_state, min_games)
+        if not moves or sum(weight for _, weight, _ in moves) == 0:
+            return moves[0][0] if moves else None
+        return generator.choices([move for move, _, _ in moves], [weight for _, weight, _ in moves])[0]
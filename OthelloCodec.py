@@ -0,0 +1,124 @@
+# OthelloCodec.py
+#
+# This is the position codec, which turns a game state into bytes or text and back
+#
+# The bytes start with the 4 byte header, the version, the flags, rows and columns. The flags are 1 for the
+# full rule, 2 for the < winning condition and 4 for white to move. The black bits then the white bits follow,
+# bit row * columns + column, each as (rows * columns + 7) // 8 little endian bytes.
+#
+# The text is a line of the rule, rows, columns, turn and winning condition, then the board as the console
+# prints it, e.g.
+#   FULL 4 4 B >
+#   . . . .
+#   . W B .
+#   . B W .
+#   . . . .
+#
+import struct
+
+import OthelloBitboard
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+
+VERSION = 1
+
+_HEADER = struct.Struct('<BBBB')
+
+_FULL_RULE = 1
+_LESS_WINS = 2
+_WHITE_TURN = 4
+
+_COLOR_NAMES = {OthelloGameLogic.NONE: '.', OthelloGameLogic.BLACK: 'B', OthelloGameLogic.WHITE: 'W'}
+_COLORS = {name: color for color, name in _COLOR_NAMES.items()}
+
+
+class InvalidPositionError(Exception):
+    """Raises whenever bytes or text are not a position of this version"""
+    pass
+
+
+def _new_game_state(rule: str, rows: int, columns: int, winning_condition: str, backend: str) -> GameState:
+    try:
+        return GameState(rule, rows, columns, 'B', 'B', winning_condition, backend=backend)
+    except (OthelloGameLogic.OddColRowNumber, ValueError):
+        raise InvalidPositionError
+
+
+def encode(game_state: GameState) -> bytes:
+    """
+    :param game_state: The Othello Game State
+    :return: The bytes of the position
+    """
+    board = game_state.board
+    black, white = OthelloBitboard.board_bits(board)
+    flags = 0
+    if game_state.rule == 'FULL':
+        flags |= _FULL_RULE
+    if game_state.winning_condition == '<':
+        flags |= _LESS_WINS
+    if game_state.turn == OthelloGameLogic.WHITE:
+        flags |= _WHITE_TURN
+    size = (board.rows * board.columns + 7) // 8
+    return _HEADER.pack(VERSION, flags, board.rows, board.columns) + \
+        black.to_bytes(size, 'little') + white.to_bytes(size, 'little')
+
+
+def decode(data: bytes, backend: str = 'BITBOARD') -> GameState:
+    """
+    :param data: The bytes from encode
+    :param backend: Backend of the game state
+    :return: The Othello Game State of the position, with no moves to undo
+    """
+    if len(data) < _HEADER.size:
+        raise InvalidPositionError
+    version, flags, rows, columns = _HEADER.unpack_from(data)
+    size = (rows * columns + 7) // 8
+    if version != VERSION or len(data) != _HEADER.size + 2 * size:
+        raise InvalidPositionError
+
+    black = int.from_bytes(data[_HEADER.size:_HEADER.size + size], 'little')
+    white = int.from_bytes(data[_HEADER.size + size:], 'little')
+    if black & white or (black | white) >> (rows * columns):
+        raise InvalidPositionError
+
+    game_state = _new_game_state('FULL' if flags & _FULL_RULE else 'SIMPLE', rows, columns,
+                                 '<' if flags & _LESS_WINS else '>', backend)
+    game_state.set_bits(black, white, OthelloGameLogic.WHITE if flags & _WHITE_TURN else OthelloGameLogic.BLACK)
+    return game_state
+
+
+def to_text(game_state: GameState) -> str:
+    """
+    :param game_state: The Othello Game State
+    :return: The text of the position
+    """
+    board = game_state.board
+    lines = ['{} {} {} {} {}'.format(game_state.rule, board.rows, board.columns, _COLOR_NAMES[game_state.turn],
+                                     game_state.winning_condition)]
+    for row in range(board.rows):
+        lines.append(' '.join(_COLOR_NAMES[board.get_color((row, column))] for column in range(board.columns)))
+    return '\n'.join(lines)
+
+
+def from_text(text: str, backend: str = 'BITBOARD') -> GameState:
+    """
+    :param text: The text from to_text, the spaces between the places can be left out
+    :param backend: Backend of the game state
+    :return: The Othello Game State of the position, with no moves to undo
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    try:
+        rule, rows, columns, turn, winning_condition = lines[0].split()
+        rows, columns = int(rows), int(columns)
+        cells = ''.join(''.join(line.split()) for line in lines[1:])
+        colors = [_COLORS[cell] for cell in cells]
+        turn = _COLORS[turn]
+    except (IndexError, ValueError, KeyError):
+        raise InvalidPositionError
+    if rule not in ('SIMPLE', 'FULL') or winning_condition not in ('>', '<') or len(colors) != rows * columns or \
+            turn == OthelloGameLogic.NONE:
+        raise InvalidPositionError
+
+    game_state = _new_game_state(rule, rows, columns, winning_condition, backend)
+    game_state.set_position(colors, turn)
+    return game_state
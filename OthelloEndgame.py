@@ -0,0 +1,312 @@
+# OthelloEndgame.py
+#
+# This is the endgame solver, which searches the game to the end for perfect play when few empty places are left
+#
+import functools
+import time
+
+import OthelloBitboard
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+from OthelloBitboard import popcount
+
+FASTEST_FIRST_EMPTIES = 7  # With at least this many empty places, moves are ordered by the mobility they leave
+SMALL_EMPTIES = 4  # With this many empty places or fewer, the empty places are tried without ordering
+TABLE_EMPTIES = 8  # With at least this many empty places, positions are kept in the table
+TABLE_SIZE = 1 << 20  # Positions in the table before it is emptied
+
+_EXACT = 0
+_LOWER = 1
+_UPPER = 2
+
+
+@functools.lru_cache(maxsize=None)
+def _neighbours(rows: int, columns: int) -> (int,):
+    """
+    :return: The bits next to each cell of the board, by the index of the cell
+    """
+    return tuple(OthelloBitboard.neighbour_bits(1 << index, rows, columns) for index in range(rows * columns))
+
+
+@functools.lru_cache(maxsize=None)
+def _regions(rows: int, columns: int) -> (int,):
+    """
+    The board split into four quarters, the regions used for parity
+    :return: The bits of each region of the board, by the index of the cell
+    """
+    quarters = [0, 0, 0, 0]
+    for row in range(rows):
+        for column in range(columns):
+            quarter = (row >= rows // 2) * 2 + (column >= columns // 2)
+            quarters[quarter] |= 1 << (row * columns + column)
+    return tuple(quarters[(index // columns >= rows // 2) * 2 + (index % columns >= columns // 2)]
+                 for index in range(rows * columns))
+
+
+class EndgameResult:
+    def __init__(self, best_move: tuple, score: int, nodes: int, seconds: float):
+        """
+        The result of solving a game
+        :param best_move: The best move, None if the current turn has to pass or the game is over
+        :param score: The final disc difference of the current turn minus the other player, with perfect play
+        :param nodes: How many nodes were searched
+        :param seconds: How long the solving took
+        """
+        self.best_move = best_move
+        self.score = score
+        self.nodes = nodes
+        self.seconds = seconds
+
+    @property
+    def nodes_per_second(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.nodes / self.seconds
+
+
+def empty_places(game_state: GameState) -> int:
+    """
+    :param game_state: The Othello Game State
+    :return: Number of empty places on the board
+    """
+    board = game_state.board
+    return board.rows * board.columns - board.black_disc - board.white_disc
+
+
+def solve(game_state: GameState) -> EndgameResult:
+    """
+    Search the game to the end, with both players playing for the winning condition
+    :param game_state: The Othello Game State, which is not changed
+    :return: The best move and the final disc difference
+    """
+    return EndgameSolver(game_state.rule, game_state.board.rows, game_state.board.columns,
+                         game_state.winning_condition).solve(game_state)
+
+
+class EndgameSolver:
+    def __init__(self, rule: str, rows: int, columns: int, winning_condition: str):
+        """
+        The endgame solver for games of these settings, which works on the bits of the pieces
+        :param rule: SIMPLE or FULL
+        :param rows: Rows of the board
+        :param columns: Columns of the board
+        :param winning_condition: > for largest number of discs, < for smallest number of discs
+        """
+        self.rule = rule
+        self.rows = rows
+        self.columns = columns
+        self._sign = -1 if winning_condition == '<' else 1
+        self._full = OthelloBitboard.full_mask(rows, columns)
+        self._neighbours = _neighbours(rows, columns)
+        self._regions = _regions(rows, columns)
+        self._table = {}
+        self.nodes = 0
+
+    def solve(self, game_state: GameState) -> EndgameResult:
+        """
+        Search the game to the end
+        :param game_state: The Othello Game State, which is not changed
+        :return: The best move and the final disc difference
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+        self._table = {}
+
+        black, white = OthelloBitboard.board_bits(game_state.board)
+        if game_state.turn == OthelloGameLogic.BLACK:
+            own, opponent = black, white
+        else:
+            own, opponent = white, black
+
+        best_move = None
+        empties = popcount(~(own | opponent) & self._full)
+        moves = self._moves(own, opponent, ~(own | opponent) & self._full)
+        if not moves:
+            score = self._no_moves(own, opponent, -self._worst(), self._worst(), empties, False)
+        else:
+            alpha, beta = -self._worst(), self._worst()
+            for bit, flips, after_empties in self._ordered(own, opponent, moves, empties):
+                after_own, after_opponent = own | bit | flips, opponent & ~flips
+                if best_move is None:
+                    score = -self._search(after_opponent, after_own, -beta, -alpha, after_empties)
+                else:
+                    score = -self._search(after_opponent, after_own, -alpha - 1, -alpha, after_empties)
+                    if score > alpha:
+                        score = -self._search(after_opponent, after_own, -beta, -score, after_empties)
+                if best_move is None or score > alpha:
+                    alpha = score
+                    best_move = divmod(bit.bit_length() - 1, self.columns)
+            score = alpha
+
+        return EndgameResult(best_move, score * self._sign, self.nodes, time.perf_counter() - start)
+
+    def _worst(self) -> int:
+        """ More than any disc difference """
+        return self.rows * self.columns + 1
+
+    def _final(self, own: int, opponent: int) -> int:
+        """ The score of the finished game """
+        return (popcount(own) - popcount(opponent)) * self._sign
+
+    def _moves(self, own: int, opponent: int, empty: int) -> [(int, int)]:
+        """
+        Every move with the places it flips, found by trying each empty place
+        :return: List of the bit of the move and the bits it flips
+        """
+        moves = []
+        neighbours = self._neighbours
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            if not neighbours[bit.bit_length() - 1] & opponent:
+                continue
+            if self.rule == 'SIMPLE':
+                moves.append((bit, neighbours[bit.bit_length() - 1]))
+                continue
+            flips = OthelloBitboard.full_flips(own, opponent, bit, self.rows, self.columns)
+            if flips:
+                moves.append((bit, flips))
+        return moves
+
+    def _ordered(self, own: int, opponent: int, moves: [(int, int)], empties: int) -> [(int, int, int)]:
+        """
+        Order the moves, fewest moves left for the other player first when there are many empty places,
+        then the moves in a region with an odd number of empty places
+        :return: List of the bit of the move, the bits it flips and the empty places after the move
+        """
+        empty = ~(own | opponent) & self._full
+        ordered = []
+        for bit, flips in moves:
+            if self.rule == 'SIMPLE':
+                after_empties = empties - popcount((bit | flips) & empty)
+            else:
+                after_empties = empties - 1
+            odd = popcount(self._regions[bit.bit_length() - 1] & empty) & 1
+            if empties >= FASTEST_FIRST_EMPTIES:
+                after_own, after_opponent = own | bit | flips, opponent & ~flips
+                if self.rule == 'SIMPLE':
+                    mobility = OthelloBitboard.simple_moves(after_opponent, after_own, self.rows, self.columns)
+                else:
+                    mobility = OthelloBitboard.full_moves(after_opponent, after_own, self.rows, self.columns)
+                mobility = popcount(mobility)
+            else:
+                mobility = 0
+            ordered.append((mobility, -odd, bit, flips, after_empties))
+        ordered.sort()
+        return [(bit, flips, after_empties) for _, _, bit, flips, after_empties in ordered]
+
+    def _no_moves(self, own: int, opponent: int, alpha: int, beta: int, empties: int, passed: bool) -> int:
+        """
+        The score when the current turn has no moves. In simple rules the game is over, in full rules
+        the turn goes to the other player like ending_condition_met, and the game is over if the other
+        player passed just before
+        """
+        if self.rule == 'SIMPLE' or passed:
+            return self._final(own, opponent)
+        return -self._search(opponent, own, -beta, -alpha, empties, True)
+
+    def _search(self, own: int, opponent: int, alpha: int, beta: int, empties: int, passed: bool = False) -> int:
+        """
+        Negamax alpha-beta search to the end of the game
+        :param own: Pieces of the current turn
+        :param opponent: Pieces of the other player
+        :param empties: Number of empty places
+        :param passed: Whether the other player just passed
+        :return: The score for the current turn
+        """
+        self.nodes += 1
+        if empties == 0:
+            return self._final(own, opponent)
+        if empties <= SMALL_EMPTIES:
+            return self._search_small(own, opponent, alpha, beta, empties, passed)
+
+        key = None
+        table_move = 0
+        if empties >= TABLE_EMPTIES:
+            key = (own, opponent)
+            entry = self._table.get(key)
+            if entry is not None:
+                flag, score, table_move = entry
+                if flag == _EXACT or (flag == _LOWER and score >= beta) or (flag == _UPPER and score <= alpha):
+                    return score
+
+        moves = self._moves(own, opponent, ~(own | opponent) & self._full)
+        if not moves:
+            return self._no_moves(own, opponent, alpha, beta, empties, passed)
+
+        ordered = self._ordered(own, opponent, moves, empties)
+        if table_move:
+            ordered.sort(key=lambda move: move[0] != table_move)
+
+        # Principal variation search, the moves after the first are searched with a null window,
+        # and searched again only if they turn out better
+        original_alpha = alpha
+        best_move = 0
+        for bit, flips, after_empties in ordered:
+            after_own, after_opponent = own | bit | flips, opponent & ~flips
+            if best_move:
+                score = -self._search(after_opponent, after_own, -alpha - 1, -alpha, after_empties)
+                if alpha < score < beta:
+                    score = -self._search(after_opponent, after_own, -beta, -score, after_empties)
+            else:
+                score = -self._search(after_opponent, after_own, -beta, -alpha, after_empties)
+            if score > alpha or not best_move:
+                best_move = bit
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+        if key is not None:
+            if len(self._table) >= TABLE_SIZE:
+                self._table = {}
+            if alpha <= original_alpha:
+                self._table[key] = (_UPPER, alpha, best_move)
+            elif alpha >= beta:
+                self._table[key] = (_LOWER, alpha, best_move)
+            else:
+                self._table[key] = (_EXACT, alpha, best_move)
+        return alpha
+
+    def _search_small(self, own: int, opponent: int, alpha: int, beta: int, empties: int, passed: bool) -> int:
+        """
+        The search for the last few empty places, which tries the empty places in order without
+        generating and ordering the moves
+        """
+        empty = ~(own | opponent) & self._full
+        neighbours = self._neighbours
+        moved = False
+        remaining = empty
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            neighbour = neighbours[bit.bit_length() - 1]
+            if not neighbour & opponent:
+                continue
+
+            if self.rule == 'SIMPLE':
+                flips = neighbour
+                after_empties = empties - popcount((bit | flips) & empty)
+            else:
+                flips = OthelloBitboard.full_flips(own, opponent, bit, self.rows, self.columns)
+                if not flips:
+                    continue
+                after_empties = empties - 1
+
+            moved = True
+            self.nodes += 1
+            after_own, after_opponent = own | bit | flips, opponent & ~flips
+            if after_empties == 0:
+                score = -self._final(after_opponent, after_own)
+            else:
+                score = -self._search_small(after_opponent, after_own, -beta, -alpha, after_empties, False)
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    return alpha
+
+        if not moved:
+            if self.rule == 'SIMPLE' or passed:
+                return self._final(own, opponent)
+            return -self._search_small(opponent, own, -beta, -alpha, empties, True)
+        return alpha
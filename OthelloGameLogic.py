@@ -3,10 +3,23 @@
 #
 # This is the game logic, with some made exceptions
 #
+import collections
+import functools
+
+import OthelloBitboard
+import OthelloZobrist
+
 NONE = 0  # This is the game constants, setting colors to integer
 BLACK = 1
 WHITE = 2
 
+UNDO_HISTORY = 100  # The number of moves that can be undone
+BACKENDS = ('LIST', 'COMPACT', 'BITBOARD')  # The ways the board of a game state can be kept
+
+
+# The 8 directions from a place as (row difference, column difference), in the order of OthelloBitboard.shifts
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
 
 class OddColRowNumber(Exception):
     """Raises whenever there is an invalid Column or Row number """
@@ -18,10 +31,23 @@ class InvalidMoveError(Exception):
     pass
 
 
+class NothingToUndoError(Exception):
+    """Raises whenever there is no move left to undo"""
+    pass
+
+
+# The record of a move, with the places the move changed, the colors of those places before the move,
+# and the turn and the number of pieces before the move
+MoveRecord = collections.namedtuple('MoveRecord', ['move', 'changed_places', 'colors',
+                                                   'turn', 'black_disc', 'white_disc'])
+
+
 class Piece:
     """
     This will be a single game piece in the game, with property of either NONE, WHITE or BLACK.
     """
+    __slots__ = ('color', 'location')
+
     def __init__(self, color: int, location: tuple):
         self.color = color
         self.location = location
@@ -51,6 +77,14 @@ class GameBoard:
         self.black_disc = 2
         self.white_disc = 2
 
+        self.hash_key = 0  # Zobrist key of the pieces, kept up to date by place_piece
+        for piece in self.list_of_pieces():
+            self.hash_key ^= OthelloZobrist.PIECE_KEYS[piece.color][OthelloZobrist.cell_index(piece.location)]
+
+        # Objects told about every change of the board, with piece_placed(place, before color, color), or with
+        # board_reset() when the whole board is replaced
+        self.listeners = []
+
     def _new_game_board(self) -> [[Piece]]:
         """
         Create a new game board using list
@@ -94,6 +128,11 @@ class GameBoard:
         before_piece_color = self.board[row][column].color
         self.board[row][column] = Piece(color, (row, column))
         self.adjust_piece_num(before_piece_color, color)
+        for listener in self.listeners:
+            listener.piece_placed(place, before_piece_color, color)
+
+        index = OthelloZobrist.cell_index(place)
+        self.hash_key ^= OthelloZobrist.PIECE_KEYS[before_piece_color][index] ^ OthelloZobrist.PIECE_KEYS[color][index]
 
     def adjust_piece_num(self, before_color: int, after_color: int) -> None:
         """
@@ -114,17 +153,100 @@ class GameBoard:
         row, column = place
         return self.board[row][column]
 
+    def get_color(self, place: tuple) -> int:
+        row, column = place
+        return self.board[row][column].color
+
     def list_of_pieces(self) -> [Piece]:
         return [piece for row in self.board for piece in row]
 
 
-def _list_of_locations(list_of_pieces: [Piece]) -> [int]:
+class CompactGameBoard(GameBoard):
     """
-    With a list of pieces, return a list of the locations of those pieces
-    :param list_of_pieces: List of pieces
-    :return: List of locations of the pieces
+    This is the board of the Othello Game State kept as one byte for the color of each place, row by row.
+    The pieces are only made when get_piece or list_of_pieces asks for them
     """
-    return [piece.location for piece in list_of_pieces]
+    def _new_game_board(self) -> bytearray:
+        """
+        Create a new game board with the same pieces as GameBoard
+        :return: The colors of the board
+        """
+        return bytearray(piece.color for row in super()._new_game_board() for piece in row)
+
+    def place_piece(self, place: tuple, color: int) -> None:
+        """
+        Place piece on the board
+        :param place: Place on the board
+        :param color: Color of piece to placed on the board
+        """
+        row, column = place
+        before_piece_color = self.board[row * self.columns + column]
+        self.board[row * self.columns + column] = color
+        self.adjust_piece_num(before_piece_color, color)
+
+        index = OthelloZobrist.cell_index(place)
+        self.hash_key ^= OthelloZobrist.PIECE_KEYS[before_piece_color][index] ^ OthelloZobrist.PIECE_KEYS[color][index]
+        for listener in self.listeners:
+            listener.piece_placed(place, before_piece_color, color)
+
+    def get_piece(self, place: tuple) -> Piece:
+        row, column = place
+        return Piece(self.board[row * self.columns + column], (row, column))
+
+    def get_color(self, place: tuple) -> int:
+        row, column = place
+        return self.board[row * self.columns + column]
+
+    def list_of_pieces(self) -> [Piece]:
+        return [Piece(color, divmod(index, self.columns)) for index, color in enumerate(self.board)]
+
+
+def _opposite_color(color: int) -> int:
+    """
+    :param color: BLACK or WHITE
+    :return: The opposite color
+    """
+    if color == BLACK:
+        return WHITE
+    else:
+        return BLACK
+
+
+class BoardGeometry:
+    """
+    The places around every place of a board size, worked out once so the game logic does not have to check
+    the edges of the board
+    """
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        self.places = tuple((row, column) for row in range(rows) for column in range(columns))
+
+        # For every place, the places next to it, and the lines of places going away from it in each direction
+        # up to the edge of the board, leaving out the directions that start outside the board
+        self.neighbours = {}
+        self.rays = {}
+        for row, column in self.places:
+            rays = []
+            for row_difference, column_difference in DIRECTIONS:
+                ray = []
+                testing_row, testing_column = row + row_difference, column + column_difference
+                while 0 <= testing_row < rows and 0 <= testing_column < columns:
+                    ray.append((testing_row, testing_column))
+                    testing_row += row_difference
+                    testing_column += column_difference
+                if ray:
+                    rays.append(tuple(ray))
+            self.rays[(row, column)] = tuple(rays)
+            self.neighbours[(row, column)] = tuple(ray[0] for ray in rays)
+
+
+@functools.lru_cache(maxsize=None)
+def board_geometry(rows: int, columns: int) -> BoardGeometry:
+    """
+    :return: The geometry of the board size, which is only made once for each size
+    """
+    return BoardGeometry(rows, columns)
 
 
 class GameState:
@@ -133,7 +255,8 @@ class GameState:
     """
 
     def __init__(self, rule: str, rows: int, columns: int,
-                 starting_player: str, top_left_disc_color: str, winning_condition: str):
+                 starting_player: str, top_left_disc_color: str, winning_condition: str,
+                 backend: str = 'LIST'):
         """
         :param rule: Rules for the game, either simple or full othello rules
         :param rows: How many rows there are in the game
@@ -141,8 +264,13 @@ class GameState:
         :param starting_player: Which color is the starting player
         :param top_left_disc_color: Which color will the top left disc be
         :param winning_condition: The winning condition, > for largest number of discs, < for smallest number of discs
+        :param backend: How the board is kept, LIST for the list of pieces, COMPACT for a byte for each place
+        or BITBOARD for two integers
         """
+        if backend not in BACKENDS:
+            raise ValueError('Unknown backend {!r}, it has to be one of {}'.format(backend, ', '.join(BACKENDS)))
         self.rule = rule
+        self.backend = backend
 
         if not (4 <= rows <= 16 and rows % 2 == 0) or not (4 <= columns <= 16 and columns % 2 == 0):
             raise OddColRowNumber
@@ -154,39 +282,99 @@ class GameState:
 
         self.winning_condition = winning_condition
 
-        self.board = GameBoard(top_left_disc_color, rows, columns)
+        if backend == 'BITBOARD':
+            self.board = OthelloBitboard.BitBoard(top_left_disc_color, rows, columns)
+        elif backend == 'COMPACT':
+            self.board = CompactGameBoard(top_left_disc_color, rows, columns)
+        else:  # LIST
+            self.board = GameBoard(top_left_disc_color, rows, columns)
         self.winner = None
+        self.history = collections.deque(maxlen=UNDO_HISTORY)
+        self._geometry = board_geometry(rows, columns)
+
+        # The move sets of each color, kept up to date after every move instead of being searched
+        # for on the whole board. The frontier of a color is every empty place next to a piece of
+        # that color, which are the simple rule moves of the other color
+        self._frontier = {BLACK: set(), WHITE: set()}
+        self._full_moves = {BLACK: set(), WHITE: set()}
+        if backend != 'BITBOARD':
+            self._update_move_sets(self._all_places())
 
     def move(self, move: [int]) -> None:
         """
-        How a move will affect the game state depending on the rule
+        How a move will affect the game state depending on the rule, the move can be undone with undo
         :param move: The piece that the player will place on the game _state
         """
-        if self.rule == 'SIMPLE':
-            if move in self.simple_possible_moves():
-                self.board.place_piece(move, self.turn)
+        self.history.append(self.make_move(move))
 
-                for piece in self._directly_affected_pieces(move):
-                    self.board.place_piece(piece.location, self.turn)
+    def make_move(self, move: [int]) -> MoveRecord:
+        """
+        Make the move and return what is needed to unmake it
+        :param move: The piece that the player will place on the game _state
+        :return: The record of the move for unmake_move
+        """
+        move = tuple(move)
+        changed_places = self._changed_places(move)
+        record = MoveRecord(move, tuple(changed_places),
+                            tuple(self.board.get_color(place) for place in changed_places),
+                            self.turn, self.board.black_disc, self.board.white_disc)
 
-                self._new_turn()
-            else:
-                raise InvalidMoveError
+        for place in changed_places:
+            self.board.place_piece(place, self.turn)
+        if self.backend != 'BITBOARD':
+            self._update_move_sets(self._places_to_update(changed_places))
 
-        if self.rule == 'FULL':
-            if move in self.full_possible_moves():
-                self.board.place_piece(move, self.turn)
+        self._new_turn()
+        return record
 
-                for directly_affected_piece in self._directly_affected_pieces(move):
-                    if self._full_affected_pieces(move, directly_affected_piece) is not None:
-                        'This means that if there are no affected pieces going in the direction of this directly'
-                        'affected piece, then we\'ll skip'
-                        for affected_piece in self._full_affected_pieces(move, directly_affected_piece):
-                            self.board.place_piece(affected_piece.location, self.turn)
+    def unmake_move(self, record: MoveRecord) -> None:
+        """
+        Put the game state back to how it was before the move of the record was made
+        :param record: The record returned by make_move, has to be the last move made
+        """
+        for place, color in zip(record.changed_places, record.colors):
+            self.board.place_piece(place, color)
+        if self.backend != 'BITBOARD':
+            self._update_move_sets(self._places_to_update(record.changed_places))
 
-                self._new_turn()
+        self.turn = record.turn
+        self.winner = None
+
+    def undo(self) -> None:
+        """ Undo the last move made with move """
+        if len(self.history) == 0:
+            raise NothingToUndoError
+        self.unmake_move(self.history.pop())
+
+    def _changed_places(self, move: tuple) -> [tuple]:
+        """
+        The places that will become the color of the current turn if the move is made
+        :param move: The move
+        :return: List of the places, starting with the move
+        """
+        row, column = move
+        if not (0 <= row < self.board.rows and 0 <= column < self.board.columns):
+            raise InvalidMoveError
+
+        if self.rule == 'SIMPLE':
+            if self.backend == 'BITBOARD':
+                possible = self.board.is_simple_move(move, self.turn)
             else:
-                raise InvalidMoveError
+                possible = move in self._frontier[self._opposite_turn_color()]
+            if possible:
+                return [move] + list(self._testing_places(move))
+
+        elif self.rule == 'FULL':
+            if self.backend == 'BITBOARD':
+                flipped_places = self.board.full_flipped_places(move, self.turn)
+            elif move in self._full_moves[self.turn]:
+                flipped_places = self._flipped_places(move, self.turn)
+            else:
+                flipped_places = []
+            if flipped_places:
+                return [move] + flipped_places
+
+        raise InvalidMoveError
 
     def ending_condition_met(self) -> bool:
         """
@@ -194,7 +382,7 @@ class GameState:
         :return: Boolean on whether the ending condition is met
         """
         if self.rule == 'SIMPLE':
-            if len(self.simple_possible_moves()) == 0:
+            if not self._has_possible_moves():
                 self._winner()
                 return True
             else:
@@ -202,23 +390,36 @@ class GameState:
 
         elif self.rule == 'FULL':
             # This has to deal with the possibilities that there could be no moves for one side
-            if len(self.full_possible_moves()) == 0:
+            if not self._has_possible_moves():
                 self._new_turn()
-                if len(self.full_possible_moves()) == 0:
+                if not self._has_possible_moves():
                     self._winner()
                     return True
             return False
 
-    def _testing_places(self, move: [int]) -> [int]:
+    def _has_possible_moves(self) -> bool:
+        """
+        Whether the current turn has any possible moves under the rule of the game
+        :return: Boolean on whether there is a possible move
+        """
+        if self.backend == 'BITBOARD':
+            if self.rule == 'SIMPLE':
+                return len(self.simple_possible_moves()) != 0
+            else:
+                return len(self.full_possible_moves()) != 0
+
+        if self.rule == 'SIMPLE':
+            return len(self._frontier[self._opposite_turn_color()]) != 0
+        else:
+            return len(self._full_moves[self.turn]) != 0
+
+    def _testing_places(self, move: tuple) -> (tuple,):
         """
         Testing pieces for piece
         :param move: piece
         :return: Testing pieces
         """
-        list_of_places = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        row, column = move
-        return [(row + tr, column + tc) for tr, tc in list_of_places
-                if 0 <= row + tr < self.board.rows and 0 <= column + tc < self.board.columns]
+        return self._geometry.neighbours[move]
 
     def _winner(self):
         """
@@ -254,67 +455,151 @@ class GameState:
         else:
             return BLACK
 
-    def _list_of_color_pieces(self, color: int) -> [Piece]:
+    def set_position(self, colors: [int], turn: int) -> None:
+        """
+        Put the pieces on the board and set the turn, the moves before can not be undone
+        :param colors: Colors of every place on the board, row by row
+        :param turn: BLACK or WHITE
+        """
+        for place, color in zip(self._all_places(), colors):
+            if self.board.get_color(place) != color:
+                self.board.place_piece(place, color)
+        self.turn = turn
+        self.winner = None
+        self.history.clear()
+
+        if self.backend != 'BITBOARD':
+            self._frontier = {BLACK: set(), WHITE: set()}
+            self._full_moves = {BLACK: set(), WHITE: set()}
+            self._update_move_sets(self._all_places())
+
+    def set_bits(self, black: int, white: int, turn: int) -> None:
         """
-        List of a places of a certain color pieces
-        :param color: The color of pieces we are looking for
-        :return: The pieces of that specific color
+        Like set_position, with the bits of the black and white pieces, bit row * columns + column
+        :param black: Bits of the black pieces
+        :param white: Bits of the white pieces
+        :param turn: BLACK or WHITE
         """
-        return [piece for piece in self.board.list_of_pieces() if piece.color == color]
+        if self.backend != 'BITBOARD':
+            colors = []
+            for index in range(self.board.rows * self.board.columns):
+                if black >> index & 1:
+                    colors.append(BLACK)
+                elif white >> index & 1:
+                    colors.append(WHITE)
+                else:
+                    colors.append(NONE)
+            self.set_position(colors, turn)
+            return
 
-    def simple_possible_moves(self) -> {tuple}:
+        self.board.set_bits(black, white)
+        self.turn = turn
+        self.winner = None
+        self.history.clear()
+
+    def hash_key(self) -> int:
         """
-        Return the possible moves of simple rules
-        :return: Possible moves of simple rules
+        The Zobrist key of the game state, which is the key of the pieces with the turn, the rule and
+        the winning condition
+        :return: 64 bit key
         """
-        opp_pieces = self._list_of_color_pieces(self._opposite_turn_color())
-        none_pieces = _list_of_locations(self._list_of_color_pieces(NONE))
+        key = self.board.hash_key
+        if self.turn == WHITE:
+            key ^= OthelloZobrist.WHITE_TURN_KEY
+        if self.rule == 'SIMPLE':
+            key ^= OthelloZobrist.SIMPLE_RULE_KEY
+        if self.winning_condition == '<':
+            key ^= OthelloZobrist.LESS_WINS_KEY
+        return key
 
-        return {t_place for piece in opp_pieces
-                for t_place in self._testing_places(piece.location) if t_place in none_pieces}
+    def possible_moves(self) -> {tuple}:
+        """
+        Return the possible moves under the rule of the game
+        :return: Possible moves of the rule
+        """
+        if self.rule == 'SIMPLE':
+            return self.simple_possible_moves()
+        else:
+            return self.full_possible_moves()
 
-    def _directly_affected_pieces(self, move: [int]) -> [Piece]:
+    def simple_possible_moves(self) -> {tuple}:
         """
-        Return the directly affected pieces around the move
-        :param move: The move we are returning affected pieces around
-        :return: The affected pieces around the move
+        Return the possible moves of simple rules
+        :return: Possible moves of simple rules
         """
-        return [self.board.get_piece(place) for place in self._testing_places(move)]
+        if self.backend == 'BITBOARD':
+            return self.board.simple_possible_moves(self.turn)
+
+        return set(self._frontier[self._opposite_turn_color()])
 
     def full_possible_moves(self) -> {tuple}:
         """
         Possible moves for the full Othello rule
         :return: possible moves for the full Othello rule
         """
-        return {move for move in self.simple_possible_moves() for piece in self._directly_affected_pieces(move)
-                if self._full_affected_pieces(move, piece)}
+        if self.backend == 'BITBOARD':
+            return self.board.full_possible_moves(self.turn)
+
+        return set(self._full_moves[self.turn])
 
-    def _full_affected_pieces(self, move: [int], piece: Piece) -> [Piece]:
+    def _flipped_places(self, move: [int], color: int) -> [tuple]:
         """
-        Affected pieces in the full rule depending on the move and the directly affected piece
+        Places flipped in the full rule if the color moves there
         :param move: The move
-        :param piece: The directly affected piece
-        :return: List of affected pieces
-        """
-        list_of_affected_pieces = []
-        row_difference = piece.location[0] - move[0]
-        column_difference = piece.location[1] - move[1]
-        try:
-            for i in range(16):
-                testing_row = piece.location[0] + i * row_difference
-                testing_column = piece.location[1] + i * column_difference
-                testing_place = (testing_row, testing_column)
-                testing_piece = self.board.get_piece(testing_place)
-                if (
-                        testing_row < 0 or testing_column < 0 or testing_piece.color == NONE or
-                        testing_row > self.board.rows or testing_column > self.board.columns
-                ):
-                    return None
-                elif testing_piece in self._list_of_color_pieces(self.turn):
+        :param color: The color of the player moving
+        :return: List of flipped places, empty if the move is not possible
+        """
+        opposite_color = _opposite_color(color)
+        get_color = self.board.get_color
+        flipped_places = []
+        for ray in self._geometry.rays[move]:
+            for distance, place in enumerate(ray):
+                testing_color = get_color(place)
+                if testing_color != opposite_color:
+                    if testing_color == color:
+                        flipped_places.extend(ray[:distance])
                     break
-                elif testing_piece in self._list_of_color_pieces(self._opposite_turn_color()):
-                    list_of_affected_pieces.append(testing_piece)
+        return flipped_places
+
+    def _all_places(self) -> (tuple,):
+        """ Every place on the board """
+        return self._geometry.places
 
-            return list_of_affected_pieces
-        except IndexError:
-            pass
+    def _places_to_update(self, changed_places: [tuple]) -> {tuple}:
+        """
+        The places whose moves might be different after the changed places changed color, which are the
+        changed places and, in every direction, the places up to and including the first empty place
+        :param changed_places: Places that changed color
+        :return: Places to update
+        """
+        get_color = self.board.get_color
+        places = set(changed_places)
+        for changed_place in changed_places:
+            for ray in self._geometry.rays[changed_place]:
+                for place in ray:
+                    places.add(place)
+                    if get_color(place) == NONE:
+                        break
+        return places
+
+    def _update_move_sets(self, places: {tuple}) -> None:
+        """
+        Recompute the frontier and the full rule moves of both colors at the places
+        :param places: Places to recompute
+        """
+        for place in places:
+            for color in (BLACK, WHITE):
+                self._frontier[color].discard(place)
+                self._full_moves[color].discard(place)
+
+            if self.board.get_color(place) != NONE:
+                continue
+
+            for testing_place in self._testing_places(place):
+                testing_color = self.board.get_color(testing_place)
+                if testing_color != NONE:
+                    self._frontier[testing_color].add(place)
+
+            for color in (BLACK, WHITE):
+                if place in self._frontier[_opposite_color(color)] and self._flipped_places(place, color):
+                    self._full_moves[color].add(place)
@@ -82,28 +82,46 @@ class ModelState:
         :param rows: Rows of the game board
         :param columns: Columns of the game board
         """
-        self.discs = []
         self.rows = rows
         self.columns = columns
         self.row_lines = _create_lines_list(rows)
         self.col_lines = _create_lines_list(columns)
         self.x_distance = 1.0 / float(columns * 2)
         self.y_distance = 1.0 / float(rows * 2)
+        self._disc_table = [None] * (rows * columns)  # The disc of each cell, at index row * columns + column
+
+    @property
+    def discs(self) -> [Disc]:
+        """The discs of every cell that has one, row by row"""
+        return [disc for disc in self._disc_table if disc is not None]
+
+    def clear_discs(self) -> None:
+        """Remove every disc"""
+        self._disc_table = [None] * (self.rows * self.columns)
 
     def add_disc(self, center_point: point.Point, game_piece: OthelloGameLogic.Piece) -> None:
         """
-        Add disc to the list of discs
+        Add disc to the cell of the game piece, in place of the disc that was there
         :param center_point: Fractional center point of the disc
         :param game_piece: The game piece from Othello Game Logic
         """
-        self.discs.append(Disc(center_point, self.x_distance, self.y_distance, game_piece))
+        row, column = game_piece.location
+        self._disc_table[row * self.columns + column] = Disc(center_point, self.x_distance, self.y_distance,
+                                                              game_piece)
 
-    def handle_click(self, click_point: point.Point) -> [int]:
+    def handle_click(self, click_point: point.Point) -> (int, int):
         """
-        Handling click point by checking if every discs has contain the click point
+        Handling click point by working out the cell it is in. The lines of the grid are evenly spaced, so
+        the cell is the fractional coordinate times the number of cells
         :param click_point: The x and y coordinate of the click point
-        :return: The location of the game piece in the board e.g. [0,1]
+        :return: The location of the game piece in the board e.g. (0, 1), or None if there is no disc there
         """
-        for disc in self.discs:
-            if disc.contains(click_point):
-                return disc.game_piece.location
+        x, y = click_point.frac()
+        if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+            return None
+        row = min(int(y * (len(self.row_lines) + 1)), self.rows - 1)
+        column = min(int(x * (len(self.col_lines) + 1)), self.columns - 1)
+        disc = self._disc_table[row * self.columns + column]
+        if disc is None:
+            return None
+        return disc.game_piece.location
@@ -1,9 +1,35 @@
+import multiprocessing
+import queue
 import tkinter
 import point
-from OthelloGameLogic import GameState, InvalidMoveError
+import OthelloGameLogic
+import OthelloCodec
+import OthelloSearch
+import OthelloZobrist
+from OthelloGameLogic import GameState, InvalidMoveError, NothingToUndoError
 import OthelloGameModel
 
 DEFAULT_FONT = ('Helvetica', 14)
+BACKGROUND = '#c0cde0'
+POSSIBLE_MOVE_FILL = '#DCDCDC'
+COMPUTER_TIME_LIMIT = 2.0  # Seconds the computer player searches for each move
+POLL_MILLISECONDS = 50  # How often the window checks on the search of the computer player
+
+
+def _computer_search(position: tuple, time_limit: float, results: multiprocessing.Queue) -> None:
+    """
+    Search for the move of the computer player, in its own process so the window does not freeze. Each finished
+    depth is put on the queue as ('progress', depth, best move, score), then the move as ('done', best move)
+    :param position: The position from OthelloCodec.encode
+    """
+    game_state = OthelloCodec.decode(position)
+
+    def progress(result: OthelloSearch.SearchResult) -> None:
+        results.put(('progress', result.depth, result.best_move, result.score))
+
+    searcher = OthelloSearch.Searcher(transposition_table=OthelloZobrist.TranspositionTable())
+    result = searcher.search(game_state, time_limit=time_limit, progress=progress)
+    results.put(('done', result.best_move))
 
 
 def _place_widget(widget: tkinter.Widget, row: int, column: int, columnspan: int,  padx: int, pady: int, sticky: int):
@@ -20,7 +46,7 @@ class GameDialog:
         self._create_label('Please set the game setting: ')
 
         labels = ['Rules: ', 'Rows: ', 'Columns: ', 'Starting Player: ',
-                  'Top Left Corner Piece: ', 'Winning Condition: ',
+                  'Top Left Corner Piece: ', 'Winning Condition: ', 'Computer Player: ',
                   '> is for one with more pieces wins, < is for one with less pieces wins']
         for label in labels:
             self._create_label(label)
@@ -44,8 +70,11 @@ class GameDialog:
         self._winning_var = self._create_vars()
         self._create_menu(self._winning_var, ['>', '<'], 6, 1)
 
+        self._computer_var = self._create_vars()
+        self._create_menu(self._computer_var, ['None', 'Black', 'White'], 7, 1)
+
         button_frame = tkinter.Frame(master=self.dialog_window)
-        _place_widget(button_frame, 8, 0, 2, 10, 10, tkinter.E + tkinter.S)
+        _place_widget(button_frame, 9, 0, 2, 10, 10, tkinter.E + tkinter.S)
 
         ok_button = tkinter.Button(
             master=button_frame, text='OK', font=DEFAULT_FONT,
@@ -83,6 +112,15 @@ class GameDialog:
         winning = self._winning_var.get()
         return [rules, rows, columns, starting, top_left, winning]
 
+    def computer_player(self) -> int:
+        """Return the color the computer plays, or NONE if there is no computer player"""
+        computer = self._computer_var.get()
+        if computer == 'Black':
+            return OthelloGameLogic.BLACK
+        elif computer == 'White':
+            return OthelloGameLogic.WHITE
+        return OthelloGameLogic.NONE
+
     def _on_ok_button(self) -> None:
         """When the ok button is pressed, """
         self.ok_clicked = True
@@ -129,6 +167,12 @@ class OthelloGameApplication:
             self._game_state = GameState(rules, rows, columns, starting, top_left, winning)
             if dialog.ok_clicked is True:
                 break
+        self._computer_color = dialog.computer_player()
+
+        # The search of the computer player, which runs in its own process while the window keeps going
+        self._computer_process = None
+        self._computer_results = None
+        self._computer_poll = None
 
         self._model_state = OthelloGameModel.ModelState(
             self._game_state.board.rows, self._game_state.board.columns
@@ -136,11 +180,14 @@ class OthelloGameApplication:
 
         self._canvas = tkinter.Canvas(
             master=self._root_window, width=400, height=400,
-            background='#c0cde0'
+            background=BACKGROUND
         )
 
         self._canvas.bind('<Configure>', self._on_canvas_resized)
         self._canvas.bind('<Button-1>', self._on_canvas_clicked)
+        self._root_window.bind('<Control-z>', self._on_undo)
+        self._root_window.bind('<Control-n>', self._on_new_game)
+        self._root_window.protocol('WM_DELETE_WINDOW', self._on_close)
 
         self._canvas.grid(
             row=0, column=0, columnspan=2, padx=0, pady=0,
@@ -150,18 +197,29 @@ class OthelloGameApplication:
         self._root_window.rowconfigure(0, weight=1)
         self._root_window.columnconfigure(0, weight=1)
 
+        # The status label and the canvas items are made once, then only changed
+        self._status_label = tkinter.Label(master=self._root_window, font=DEFAULT_FONT)
+        _place_widget(self._status_label, 1, 0, 1, 0, 0, tkinter.S)
+        self._computer_label = tkinter.Label(master=self._root_window, font=DEFAULT_FONT)
+        _place_widget(self._computer_label, 2, 0, 1, 0, 0, tkinter.S)
+        self._disc_items = {}  # Location of each disc to its oval on the canvas
+        self._line_items = []  # Tuples of the orientation, the fractional line point and the line on the canvas
+        self._fills = {}  # Location of each disc to the fill its oval has now
+        self._create_items()
+
         self._ok_clicked = False
 
         self._root_window.update()
         self._root_window.deiconify()  # The root windows will now reappear
+        self._start_computer()
 
     def run(self):
         """Main loop for the root window"""
         self._root_window.mainloop()
 
     def _on_canvas_resized(self, event: tkinter.Event) -> None:
-        """When the canvas is resized, redraw"""
-        self._redraw()
+        """When the canvas is resized, move the items to the new size"""
+        self._reposition()
 
     def _on_canvas_clicked(self, event: tkinter.Event) -> None:
         """When the canvas is clicked, check if there is a valid move"""
@@ -170,6 +228,9 @@ class OthelloGameApplication:
 
         click_point = point.from_pixel(event.x, event.y, width, height)
 
+        if self._computer_process is not None:
+            return  # The computer is thinking
+
         move = self._model_state.handle_click(click_point)
         if move:
             try:
@@ -179,9 +240,129 @@ class OthelloGameApplication:
                 self._error_dialog()
 
         self._winner_dialog()
+        self._start_computer()
+
+    def _on_undo(self, event: tkinter.Event) -> None:
+        """When Control-Z is pressed, take back the last move, and the moves of the computer player before it"""
+        self._cancel_computer()
+        try:
+            self._game_state.undo()
+            while self._game_state.turn == self._computer_color and self._game_state.history:
+                self._game_state.undo()
+            self._redraw()
+        except NothingToUndoError:
+            pass
+        self._start_computer()
+
+    def _on_new_game(self, event: tkinter.Event) -> None:
+        """When Control-N is pressed, stop the computer player and start the game of a new game dialog"""
+        self._cancel_computer()
+        dialog = GameDialog()
+        dialog.show()
+        if dialog.ok_clicked is True:
+            self._game_state = GameState(*dialog.game_settings())
+            self._computer_color = dialog.computer_player()
+            self._model_state = OthelloGameModel.ModelState(
+                self._game_state.board.rows, self._game_state.board.columns
+            )
+            self._create_items()
+        self._start_computer()
+
+    def _on_close(self) -> None:
+        """When the window is closed, stop the computer player first"""
+        self._cancel_computer()
+        self._root_window.destroy()
+
+    def _start_computer(self) -> None:
+        """Start the search of the computer player if it is its turn"""
+        if self._computer_process is not None or self._game_state.turn != self._computer_color:
+            return
+        if self._game_state.winner is not None or not self._game_state.possible_moves():
+            return
+
+        self._computer_results = multiprocessing.Queue()
+        self._computer_process = multiprocessing.Process(
+            target=_computer_search, daemon=True,
+            args=(OthelloCodec.encode(self._game_state), COMPUTER_TIME_LIMIT, self._computer_results))
+        self._computer_process.start()
+        self._computer_label.configure(text='Computer: thinking')
+        self._computer_poll = self._root_window.after(POLL_MILLISECONDS, self._poll_computer)
+
+    def _poll_computer(self) -> None:
+        """
+        Show the progress of the search of the computer player, and make its move when it is done. If its process
+        ended without a move, the search is given up and the move is left to the player
+        """
+        self._computer_poll = None
+        # Checked before the queue is read, a process that has ended has put all of its messages on the queue
+        alive = self._computer_process.is_alive()
+        while True:
+            try:
+                message = self._computer_results.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] == 'progress':
+                _, depth, move, score = message
+                self._computer_label.configure(text='Computer: depth {} best {} {} score {}'.format(
+                    depth, move[0] + 1, move[1] + 1, score))
+            else:
+                self._cancel_computer()
+                self._game_state.move(message[1])
+                self._redraw()
+                self._winner_dialog()
+                self._start_computer()  # The computer moves again when the other player has to pass
+                return
+
+        if not alive:
+            exit_code = self._computer_process.exitcode
+            self._cancel_computer()
+            self._computer_label.configure(text='Computer: search failed (exit code {})'.format(exit_code))
+            return
+        self._computer_poll = self._root_window.after(POLL_MILLISECONDS, self._poll_computer)
+
+    def _cancel_computer(self) -> None:
+        """Stop the search of the computer player, if there is one"""
+        if self._computer_poll is not None:
+            self._root_window.after_cancel(self._computer_poll)
+            self._computer_poll = None
+        if self._computer_process is not None:
+            self._computer_process.terminate()
+            self._computer_process.join()
+            self._computer_process = None
+            self._computer_results.close()
+            self._computer_results = None
+            self._computer_label.configure(text='')
+
+    def _create_items(self) -> None:
+        """Create the ovals of every disc and the lines of the grid, which are kept for the whole game"""
+        self._canvas.delete(tkinter.ALL)
+        self._disc_items = {}
+        self._line_items = []
+        self._fills = {}
+
+        self._load_discs()
+        for disc in self._model_state.discs:
+            self._disc_items[disc.game_piece.location] = self._canvas.create_oval(
+                0, 0, 0, 0, fill=BACKGROUND, outline=BACKGROUND)
+            self._fills[disc.game_piece.location] = BACKGROUND
+        for line in self._model_state.row_lines:
+            self._line_items.append(('H', line, self._canvas.create_line(0, 0, 0, 0)))
+        for line in self._model_state.col_lines:
+            self._line_items.append(('V', line, self._canvas.create_line(0, 0, 0, 0)))
+
+        self._reposition()
+        self._redraw()
 
-    def _redraw(self, location=None) -> None:
-        """Redraw whatever is on the main dialog"""
+    def _reposition(self) -> None:
+        """Move every item to where it is on the canvas of the current size"""
+        for orientation, line, item in self._line_items:
+            self._move_line(orientation, line, item)
+        for disc in self._model_state.discs:
+            self._move_disc(disc, self._disc_items[disc.game_piece.location])
+
+    def _redraw(self) -> None:
+        """Update the status label, and recolor the discs that changed color or stopped or started being a move"""
         rule = self._game_state.rule + ' '
 
         if self._game_state.turn == 1:
@@ -192,44 +373,43 @@ class OthelloGameApplication:
         game_condition = 'B:' + str(self._game_state.board.black_disc) + \
                          ' W:' + str(self._game_state.board.white_disc)
 
-        label = rule + turn + game_condition
-        tk_label = tkinter.Label(master=self._root_window, text=label, font=DEFAULT_FONT)
-        _place_widget(tk_label, 1, 0, 1, 0, 0, tkinter.S)
+        self._status_label.configure(text=rule + turn + game_condition)
 
-        self._canvas.delete(tkinter.ALL)
-        self._load_discs()
         if self._game_state.rule == 'FULL':
             possible_moves = self._game_state.full_possible_moves()
         else:
             possible_moves = self._game_state.simple_possible_moves()
 
+        board = self._game_state.board
         for disc in self._model_state.discs:
-            if disc.game_piece.color != 0 or disc.game_piece.location in possible_moves:
-                self._draw_disc(disc)
-        for line in self._model_state.row_lines:
-            self._draw_line('H', line)
-        for line in self._model_state.col_lines:
-            self._draw_line('V', line)
-
-    def _draw_line(self, orientation: str, line: int) -> None:
+            location = disc.game_piece.location
+            color = board.get_color(location)
+            disc.set_color(color)
+            if color == OthelloGameLogic.NONE and location in possible_moves:
+                disc.fill = POSSIBLE_MOVE_FILL
+            if disc.fill != self._fills[location]:
+                self._canvas.itemconfigure(self._disc_items[location], fill=disc.fill)
+                self._fills[location] = disc.fill
+
+    def _move_line(self, orientation: str, line: float, item: int) -> None:
         """
-        Draw the line based on the orientation
+        Move the line based on the orientation
         :param orientation: Either horizontal or vertical
         :param line: Fractional line point
-        :return:
+        :param item: The line on the canvas
         """
         canvas_width = self._canvas.winfo_width()
         canvas_height = self._canvas.winfo_height()
 
         if orientation == 'H':
             y = line * canvas_height
-            self._canvas.create_line(0, y, canvas_width, y)
+            self._canvas.coords(item, 0, y, canvas_width, y)
         elif orientation == 'V':
             x = line * canvas_width
-            self._canvas.create_line(x, 0, x, canvas_height)
+            self._canvas.coords(item, x, 0, x, canvas_height)
 
-    def _draw_disc(self, disc: OthelloGameModel.Disc) -> None:
-        """Draw discs on the canvas"""
+    def _move_disc(self, disc: OthelloGameModel.Disc, item: int) -> None:
+        """Move the oval of the disc on the canvas"""
         canvas_width = self._canvas.winfo_width()
         canvas_height = self._canvas.winfo_height()
 
@@ -237,16 +417,15 @@ class OthelloGameApplication:
 
         x_distance = int((self._model_state.x_distance - 0.0005) * canvas_width)
         y_distance = int((self._model_state.y_distance - 0.0005) * canvas_height)
-        if disc.game_piece.color == 0:
-            disc.fill = '#DCDCDC'
-        self._canvas.create_oval(
+        self._canvas.coords(
+            item,
             center_x - x_distance, center_y - y_distance,
-            center_x + x_distance, center_y + y_distance,
-            fill=disc.fill, outline='#c0cde0')
+            center_x + x_distance, center_y + y_distance)
 
     def _load_discs(self) -> None:
-        """Load disc into the canvas"""
+        """Load a disc for every place of the board into the model, once for each game"""
         board = self._game_state.board
+        self._model_state.clear_discs()
         for piece in board.list_of_pieces():
             row, col = piece.location
             row_frac = float(1 + row * 2) / float(board.rows * 2)
@@ -266,7 +445,7 @@ class OthelloGameApplication:
             _place_widget(button_frame, 1, 0, 1, 10, 10, tkinter.E)
 
             ok_button = tkinter.Button(master=button_frame, text='OK',
-                                       font=DEFAULT_FONT, command=self._root_window.destroy)
+                                       font=DEFAULT_FONT, command=self._on_close)
             _place_widget(ok_button, 0, 0, 1, 10, 10, tkinter.E)
 
     def _error_dialog(self):
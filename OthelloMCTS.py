@@ -0,0 +1,335 @@
+# OthelloMCTS.py
+#
+# This is the Monte Carlo tree search player (UCT), which plays random games from the position and grows
+# a tree toward the moves that win them most often
+#
+# The tree and the random games only keep the bits of the black and white pieces and the turn, not game
+# states. The tree is kept between moves, so the part of it under the move that was played is used again.
+# With more than one process, every process grows its own tree from the position and the visits of the
+# moves of the root are added up (root parallel).
+#
+import math
+import multiprocessing
+import random
+import time
+
+import OthelloBitboard
+import OthelloCodec
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+
+EXPLORATION = 1.4  # How much the search tries moves it knows little about, the UCT constant
+_CHECK_EVERY = 64  # How many rollouts between checks of the time limit
+_PASS = 0  # The move of a pass, no place has the bit 0
+
+
+class _Rules:
+    """
+    The moves of the rule of a board size on the bits of the pieces
+    """
+    def __init__(self, rule: str, rows: int, columns: int, winning_condition: str):
+        self.rule = rule
+        self.rows = rows
+        self.columns = columns
+        self.winning_condition = winning_condition
+
+    def moves(self, own: int, opponent: int) -> int:
+        """
+        :return: Bits of the possible moves of the player of own
+        """
+        if self.rule == 'SIMPLE':
+            return OthelloBitboard.simple_moves(own, opponent, self.rows, self.columns)
+        return OthelloBitboard.full_moves(own, opponent, self.rows, self.columns)
+
+    def play(self, own: int, opponent: int, move: int) -> (int, int):
+        """
+        :param move: Bit of the move
+        :return: The own and opponent bits after the move
+        """
+        if self.rule == 'SIMPLE':
+            changed = move | OthelloBitboard.neighbour_bits(move, self.rows, self.columns)
+        else:
+            changed = move | OthelloBitboard.full_flips(own, opponent, move, self.rows, self.columns)
+        return own | changed, opponent & ~changed
+
+    def next_moves(self, black: int, white: int, turn: int) -> [int]:
+        """
+        The moves of a position the way ending_condition_met() works
+        :return: List of the bits of the moves, [_PASS] if the turn has to pass, empty if the game is over
+        """
+        own, opponent = (black, white) if turn == OthelloGameLogic.BLACK else (white, black)
+        moves = self.moves(own, opponent)
+        if moves:
+            return _bits(moves)
+        if self.rule == 'FULL' and self.moves(opponent, own):
+            return [_PASS]
+        return []
+
+    def after(self, black: int, white: int, turn: int, move: int) -> (int, int, int):
+        """
+        :return: The black bits, white bits and turn after the move
+        """
+        if move == _PASS:
+            return black, white, _other(turn)
+        if turn == OthelloGameLogic.BLACK:
+            black, white = self.play(black, white, move)
+        else:
+            white, black = self.play(white, black, move)
+        return black, white, _other(turn)
+
+    def rollout(self, black: int, white: int, turn: int, generator: random.Random) -> int:
+        """
+        Play random moves to the end of the game
+        :return: The black discs less the white discs at the end
+        """
+        own, opponent = (black, white) if turn == OthelloGameLogic.BLACK else (white, black)
+        passed = False
+        while True:
+            moves = self.moves(own, opponent)
+            if moves:
+                passed = False
+                # Pick one of the bits of the moves
+                for _ in range(generator.randrange(OthelloBitboard.popcount(moves))):
+                    moves &= moves - 1
+                own, opponent = self.play(own, opponent, moves & -moves)
+            elif self.rule == 'SIMPLE' or passed:
+                break
+            else:
+                passed = True
+            own, opponent = opponent, own
+            turn = _other(turn)
+
+        black, white = (own, opponent) if turn == OthelloGameLogic.BLACK else (opponent, own)
+        return OthelloBitboard.popcount(black) - OthelloBitboard.popcount(white)
+
+    def value(self, difference: int, color: int) -> float:
+        """
+        :param difference: The black discs less the white discs at the end of a game
+        :return: 1 if the color won, 0.5 for a draw and 0 if it lost, under the winning condition
+        """
+        if difference == 0:
+            return 0.5
+        black_wins = (difference > 0) == (self.winning_condition == '>')
+        return 1.0 if black_wins == (color == OthelloGameLogic.BLACK) else 0.0
+
+
+def _other(color: int) -> int:
+    return OthelloGameLogic.BLACK + OthelloGameLogic.WHITE - color
+
+
+def _bits(bits: int) -> [int]:
+    """
+    :return: List of every bit that is set
+    """
+    result = []
+    while bits:
+        lowest = bits & -bits
+        result.append(lowest)
+        bits ^= lowest
+    return result
+
+
+class _Node:
+    __slots__ = ('black', 'white', 'turn', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, black: int, white: int, turn: int, rules: _Rules):
+        """
+        A position of the tree, with the wins counted for the player that moved to it
+        """
+        self.black = black
+        self.white = white
+        self.turn = turn
+        self.children = {}  # Bit of each move that was tried to its node
+        self.untried = rules.next_moves(black, white, turn)
+        self.visits = 0
+        self.wins = 0.0
+
+    def key(self) -> (int, int, int):
+        return self.black, self.white, self.turn
+
+    def best_child(self, exploration: float) -> (int, '_Node'):
+        """
+        :return: The move and node of the child with the highest upper confidence bound
+        """
+        log_visits = math.log(self.visits)
+        best, best_value = None, -1.0
+        for move, child in self.children.items():
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = (move, child), value
+        return best
+
+
+class MCTSResult:
+    def __init__(self, best_move: tuple, visits: int, win_rate: float, rollouts: int, seconds: float,
+                 move_visits: dict):
+        """
+        The result of a search
+        :param best_move: The move with the most visits, None if the current turn has to pass
+        :param visits: Visits of the best move
+        :param win_rate: Share of the games through the best move the current turn won, a draw is half
+        :param rollouts: Random games played by the search, in every process
+        :param seconds: How long the search took
+        :param move_visits: The visits of each move of the root
+        """
+        self.best_move = best_move
+        self.visits = visits
+        self.win_rate = win_rate
+        self.rollouts = rollouts
+        self.seconds = seconds
+        self.move_visits = move_visits
+
+    @property
+    def rollouts_per_second(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.rollouts / self.seconds
+
+
+def _search_task(task: tuple) -> (dict, int):
+    """
+    Grow a tree of its own from the position, in a process of the pool
+    :param task: Tuple of the position from OthelloCodec.encode, the rollouts, the time limit, the
+    exploration and the seed
+    :return: The visits and wins of each move of the root, by bit, and the rollouts
+    """
+    position, rollouts, time_limit, exploration, seed = task
+    player = MCTSPlayer(exploration, processes=1, seed=seed)
+    player.search(OthelloCodec.decode(position), rollouts, time_limit)
+    stats = {move: (child.visits, child.wins) for move, child in player._root.children.items()}
+    return stats, player._rollouts
+
+
+class MCTSPlayer:
+    def __init__(self, exploration: float = EXPLORATION, processes: int = 1, seed: int = None):
+        """
+        The Monte Carlo tree search player
+        :param exploration: The UCT constant
+        :param processes: Processes that grow trees at the same time, this process being one of them
+        :param seed: Seed of the random games, each process gets its own seed from it
+        """
+        self.exploration = exploration
+        self.processes = processes
+        self.generator = random.Random(seed)
+        self._rules = None
+        self._root = None
+        self._rollouts = 0
+        self._pool = None
+
+    def close(self) -> None:
+        """ Stop the processes of the pool """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def search(self, game_state: GameState, rollouts: int = None, time_limit: float = None) -> MCTSResult:
+        """
+        Play random games from the game state until the rollouts or the time limit is reached
+        :param game_state: The Othello Game State, which is not changed
+        :param rollouts: Random games to play in each process
+        :param time_limit: Seconds the search can take
+        :return: The result of the search
+        """
+        if rollouts is None and time_limit is None:
+            raise ValueError('The search needs rollouts or a time limit')
+        start = time.perf_counter()
+        self._set_root(game_state)
+
+        waiting = None
+        if self.processes > 1:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.processes - 1)
+            position = OthelloCodec.encode(game_state)
+            tasks = [(position, rollouts, time_limit, self.exploration, self.generator.getrandbits(64))
+                     for _ in range(self.processes - 1)]
+            waiting = self._pool.map_async(_search_task, tasks)
+
+        self._rollouts = 0
+        deadline = None if time_limit is None else start + time_limit
+        while rollouts is None or self._rollouts < rollouts:
+            if not self._root.untried and not self._root.children:
+                break  # The game is over
+            self._iterate()
+            if deadline is not None and self._rollouts % _CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                break
+
+        # The visits and wins of the moves of the root, added up over every process
+        stats = {move: [child.visits, child.wins] for move, child in self._root.children.items()}
+        total_rollouts = self._rollouts
+        if waiting is not None:
+            for task_stats, task_rollouts in waiting.get():
+                total_rollouts += task_rollouts
+                for move, (visits, wins) in task_stats.items():
+                    stats.setdefault(move, [0, 0.0])
+                    stats[move][0] += visits
+                    stats[move][1] += wins
+
+        seconds = time.perf_counter() - start
+        if not stats:
+            return MCTSResult(None, 0, 0.0, total_rollouts, seconds, {})
+        move_visits = {self._place(move): visits for move, (visits, _) in stats.items()}
+        best = max(stats, key=lambda move: (stats[move][0], -move))
+        visits, wins = stats[best]
+        return MCTSResult(self._place(best), visits, wins / visits if visits else 0.0, total_rollouts, seconds,
+                          move_visits)
+
+    def _place(self, move: int) -> tuple:
+        """
+        :return: The (row, column) of the bit of a move, or None for a pass
+        """
+        if move == _PASS:
+            return None
+        return divmod(move.bit_length() - 1, self._rules.columns)
+
+    def _set_root(self, game_state: GameState) -> None:
+        """
+        Make the node of the game state the root, from the tree of the last search if it has the position
+        a move or two below its root
+        """
+        board = game_state.board
+        rules = _Rules(game_state.rule, board.rows, board.columns, game_state.winning_condition)
+        black, white = OthelloBitboard.board_bits(board)
+        key = (black, white, game_state.turn)
+
+        if self._rules is not None and vars(self._rules) == vars(rules):
+            nodes = [self._root]
+            for _ in range(3):
+                for node in nodes:
+                    if node.key() == key:
+                        self._root = node
+                        return
+                nodes = [child for node in nodes for child in node.children.values()]
+        self._rules = rules
+        self._root = _Node(black, white, game_state.turn, rules)
+
+    def _iterate(self) -> None:
+        """ Select a path down the tree, add a node, play a random game from it and count its result """
+        rules = self._rules
+        node = self._root
+        path = [node]
+        while not node.untried and node.children:
+            _, node = node.best_child(self.exploration)
+            path.append(node)
+
+        if node.untried:
+            move = node.untried.pop(self.generator.randrange(len(node.untried)))
+            child = _Node(*rules.after(node.black, node.white, node.turn, move), rules)
+            node.children[move] = child
+            node = child
+            path.append(node)
+
+        difference = rules.rollout(node.black, node.white, node.turn, self.generator)
+        self._rollouts += 1
+
+        # Each node counts the wins of the player that moved to it, the player whose turn it was before
+        for parent, child in zip(path, path[1:]):
+            child.visits += 1
+            child.wins += rules.value(difference, parent.turn)
+        self._root.visits += 1
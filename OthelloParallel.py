@@ -0,0 +1,155 @@
+# OthelloParallel.py
+#
+# This is the parallel search, which splits the moves of the root across a pool of processes
+#
+# Each process of the pool makes its transposition table once and empties it at the start of every root
+# move it searches. Which process gets which move depends on the scheduling, so a table kept between moves
+# would make the nodes, and with a node limit the best move, change from run to run.
+#
+import multiprocessing
+import random
+import time
+
+import OthelloCodec
+import OthelloSearch
+import OthelloZobrist
+from OthelloGameLogic import GameState
+from OthelloSearch import SearchResult, SearchTimeout, WIN_SCORE
+
+TABLE_SIZE = 16 * 1024 * 1024  # Bytes of the transposition table of each process
+
+_table = None  # The transposition table of a process of the pool, emptied for each root move
+
+
+def _start_worker(table_size: int) -> None:
+    """ Make the transposition table of a process of the pool when it starts """
+    global _table
+    _table = OthelloZobrist.TranspositionTable(table_size)
+
+
+def _search_task(task: tuple) -> tuple:
+    """
+    Search one root move, in a process of the pool, with the table of the process emptied first
+    :param task: Tuple of the position from OthelloCodec.encode, the move, the depth, the window, the deadline,
+    the node limit and the previous principal variation
+    :return: Tuple of the score, the principal variation and the nodes, the score is None if the search ran out
+    """
+    position, move, depth, alpha, beta, deadline, node_limit, principal_variation = task
+    game_state = OthelloCodec.decode(position)
+    _table.clear()
+    searcher = OthelloSearch.Searcher(transposition_table=_table)
+    time_limit = None if deadline is None else max(deadline - time.time(), 0.0)
+    try:
+        score, pv = searcher.score_move(game_state, move, depth, alpha, beta, time_limit, node_limit,
+                                        principal_variation)
+    except SearchTimeout:
+        return None, None, searcher.nodes
+    return score, pv, searcher.nodes
+
+
+class ParallelSearcher:
+    def __init__(self, processes: int = None, seed: int = 0, table_size: int = TABLE_SIZE):
+        """
+        The search engine that searches the root moves in a pool of processes. The first move is searched
+        alone to get a score to beat, then the other moves are searched at the same time with that score
+        (young brothers wait). With a node limit and the same seed, the result is always the same
+        :param processes: Processes of the pool, the number of CPUs if None
+        :param seed: Seed of the order the root moves are first tried in
+        :param table_size: Bytes of the transposition table of each process
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+        self.table_size = table_size
+        self._pool = None
+
+    def close(self) -> None:
+        """ Stop the processes of the pool """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def search(self, game_state: GameState, max_depth: int = 64,
+               time_limit: float = None, node_limit: int = None) -> SearchResult:
+        """
+        Search deeper and deeper until the max depth, time limit or node limit is reached
+        :param game_state: The Othello Game State, which is not changed
+        :param max_depth: Deepest search in moves
+        :param time_limit: Seconds the search can take
+        :param node_limit: Nodes the search can take, split evenly between the root moves of each depth
+        :return: The result of the deepest search that was finished
+        """
+        start = time.perf_counter()
+        deadline = None if time_limit is None else time.time() + time_limit
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes, _start_worker, (self.table_size,))
+
+        root_moves = sorted(game_state.possible_moves())
+        if not root_moves:
+            return SearchResult(None, 0, 0, 0, time.perf_counter() - start, [None])
+        random.Random(self.seed).shuffle(root_moves)
+
+        position = OthelloCodec.encode(game_state)
+        empties = game_state.board.rows * game_state.board.columns - \
+            game_state.board.black_disc - game_state.board.white_disc
+        nodes = 0
+        pv = []
+        result = SearchResult(root_moves[0], 0, 0, 0, 0.0, [root_moves[0]])
+        for depth in range(1, max_depth + 1):
+            remaining = None if node_limit is None else node_limit - nodes
+            if remaining is not None and remaining <= 0:
+                break
+
+            # The first move is searched in the pool too, so it meets the table entries of the earlier depths.
+            # It is searched with the whole window, to get the score the other moves have to beat
+            beta = WIN_SCORE * 2
+            first = (position, root_moves[0], depth, -beta, beta, deadline, remaining, pv)
+            alpha, best_pv, first_nodes = self._pool.apply(_search_task, (first,))
+            nodes += first_nodes
+            if alpha is None:
+                break
+
+            # The other moves only have to be shown to be no better, which a null window does with far fewer
+            # nodes. The moves that are better are searched again with the whole window
+            tasks = []
+            for move in root_moves[1:]:
+                task_limit = None if remaining is None else (remaining - first_nodes) // (len(root_moves) - 1)
+                tasks.append((position, move, depth, alpha, alpha + 1, deadline, task_limit, pv))
+            timed_out = False
+            better = []
+            for task, (score, move_pv, task_nodes) in zip(tasks, self._pool.map(_search_task, tasks)):
+                nodes += task_nodes
+                if score is None:
+                    timed_out = True
+                elif score > alpha:
+                    better.append(task[1])
+            for move in better:
+                if timed_out:
+                    break
+                task_limit = None if node_limit is None else max(node_limit - nodes, 0)
+                task = (position, move, depth, alpha, beta, deadline, task_limit, pv)
+                score, move_pv, task_nodes = self._pool.apply(_search_task, (task,))
+                nodes += task_nodes
+                if score is None:
+                    timed_out = True
+                elif score > alpha:
+                    alpha, best_pv = score, move_pv
+            if timed_out:
+                break
+
+            pv = best_pv
+            result = SearchResult(pv[0], alpha, depth, nodes, 0.0, pv)
+            root_moves.remove(pv[0])
+            root_moves.insert(0, pv[0])
+            if depth >= empties:
+                break
+
+        result.nodes = nodes
+        result.seconds = time.perf_counter() - start
+        return result
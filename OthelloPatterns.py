@@ -0,0 +1,311 @@
+# OthelloPatterns.py
+#
+# This is the pattern evaluator, which scores a position by looking up each line, edge and corner of the
+# board in a weight table, and the trainer that fits the tables to the results of recorded games
+#
+# A pattern is a list of places, and its index is the base 3 number of their colors (NONE = 0, BLACK = 1,
+# WHITE = 2), the first place being the highest digit. The patterns that are the same under a symmetry of
+# the board share one table. Lines longer than MAX_PATTERN_LENGTH are cut into pieces, so the tables stay
+# small on every board size.
+#
+# The tables predict the black discs less the white discs at the end of the game, with one set of tables
+# for each phase of the game, which is found from the number of discs on the board.
+#
+import array
+import functools
+
+import numpy
+
+import OthelloGameLogic
+from OthelloGameLogic import GameState, InvalidMoveError
+
+MAX_PATTERN_LENGTH = 8  # Longest line pattern, so the biggest table is the 3 ** 9 weights of the 3 by 3 corner
+MIN_PATTERN_LENGTH = 4  # Shorter diagonals are left out
+PHASES = 4  # Sets of tables, from the start of the game to the end
+REGULARIZATION = 100.0  # Pull of the trainer toward zero weights, for the patterns seen in few positions
+TRAINING_STEPS = 100  # Conjugate gradient steps of the trainer for each phase
+
+
+def _pieces(line: [tuple]) -> [[tuple]]:
+    """
+    :return: The line cut into pieces of at most MAX_PATTERN_LENGTH places, as even as they can be
+    """
+    count = -(-len(line) // MAX_PATTERN_LENGTH)
+    size = -(-len(line) // count)
+    return [line[start:start + size] for start in range(0, len(line), size)]
+
+
+class BoardPatterns:
+    """
+    The patterns of a board size, made once for each size
+    """
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+
+        # Pattern types, each with its instances, the places of the instances are in the same order so that
+        # the symmetry that moves one instance to another moves each place to the place at the same position
+        types = []
+
+        for row in range(rows // 2):
+            for piece, other in zip(_pieces([(row, column) for column in range(columns)]),
+                                    _pieces([(rows - 1 - row, column) for column in range(columns)])):
+                types.append([piece, other])
+        for column in range(columns // 2):
+            for piece, other in zip(_pieces([(row, column) for row in range(rows)]),
+                                    _pieces([(row, columns - 1 - column) for row in range(rows)])):
+                types.append([piece, other])
+
+        # Diagonals down to the right from the top row and the left column, with their reflections across
+        # the middle column as the diagonals down to the left
+        starts = [(0, column) for column in range(columns)] + [(row, 0) for row in range(1, rows)]
+        for start_row, start_column in starts:
+            line = []
+            row, column = start_row, start_column
+            while row < rows and column < columns:
+                line.append((row, column))
+                row, column = row + 1, column + 1
+            if len(line) < MIN_PATTERN_LENGTH:
+                continue
+            mirrored = [(row, columns - 1 - column) for row, column in line]
+            for piece, other in zip(_pieces(line), _pieces(mirrored)):
+                types.append([piece, other])
+
+        # The 3 by 3 corners, read from the corner outward
+        corners = []
+        for corner_row, corner_column, row_step, column_step in ((0, 0, 1, 1), (0, columns - 1, 1, -1),
+                                                                 (rows - 1, 0, -1, 1),
+                                                                 (rows - 1, columns - 1, -1, -1)):
+            corners.append([(corner_row + row_step * row, corner_column + column_step * column)
+                            for row in range(3) for column in range(3)])
+        types.append(corners)
+
+        # Each instance with the offset of the table of its type, and the place value of each of its places
+        self.instances = []
+        self.offsets = array.array('l')
+        self.size = 0
+        for instances in types:
+            for places in instances:
+                self.instances.append(tuple(places))
+                self.offsets.append(self.size)
+            self.size += 3 ** len(instances[0])
+        self.types = len(types)
+
+        # For each place, the instances it is in and its place value in them
+        self.place_digits = [[] for _ in range(rows * columns)]
+        for instance, places in enumerate(self.instances):
+            for position, (row, column) in enumerate(places):
+                self.place_digits[row * columns + column].append((instance, 3 ** (len(places) - 1 - position)))
+        self.place_digits = [tuple(digits) for digits in self.place_digits]
+
+    def phase(self, discs: int, phases: int) -> int:
+        """
+        :param discs: Discs on the board
+        :return: The phase of the game
+        """
+        return min(phases - 1, max(0, discs - 4) * phases // max(1, self.rows * self.columns - 4))
+
+
+@functools.lru_cache(maxsize=None)
+def board_patterns(rows: int, columns: int) -> BoardPatterns:
+    """
+    :return: The patterns of the board size, which are only made once for each size
+    """
+    return BoardPatterns(rows, columns)
+
+
+class PatternWeights:
+    def __init__(self, rows: int, columns: int, phases: int = PHASES, weights: numpy.ndarray = None):
+        """
+        The weight tables of a board size
+        :param phases: Sets of tables
+        :param weights: (phases, size) float32 array of the weights of every table next to each other, or
+        None for zeros
+        """
+        self.patterns = board_patterns(rows, columns)
+        self.rows = rows
+        self.columns = columns
+        self.phases = phases
+        if weights is None:
+            weights = numpy.zeros((phases, self.patterns.size), dtype=numpy.float32)
+        self.weights = weights
+        self.rejected = 0  # Games train left out because a move was not possible
+
+    def save(self, path: str) -> None:
+        """ Write the weights to a NumPy file """
+        numpy.save(path, self.weights)
+
+    @classmethod
+    def load(cls, path: str, rows: int, columns: int) -> 'PatternWeights':
+        """
+        :return: The weights of a file from save
+        """
+        weights = numpy.load(path)
+        if weights.shape[1] != board_patterns(rows, columns).size:
+            raise ValueError('The weights are not for a {}x{} board'.format(rows, columns))
+        return cls(rows, columns, weights.shape[0], weights.astype(numpy.float32))
+
+
+class PatternEvaluator:
+    def __init__(self, board, weights: PatternWeights):
+        """
+        The evaluation of a board by the weights, which keeps the index of every pattern up to date as pieces
+        are placed, until it is detached
+        :param board: The game board, of any backend
+        :param weights: The weight tables of the board size
+        """
+        self.board = board
+        self.weights = weights
+        self.patterns = weights.patterns
+        self._discs = 0
+        # The offset of the table of each instance plus its index, which is where its weight is. The NumPy
+        # view shares the memory of the array, so it is always up to date
+        self.table_indexes = array.array('l', self.patterns.offsets)
+        self._view = numpy.frombuffer(self.table_indexes, dtype=numpy.dtype(self.table_indexes.typecode))
+        self.board_reset()
+        board.listeners.append(self)
+
+    def detach(self) -> None:
+        """ Stop following the changes of the board """
+        self.board.listeners.remove(self)
+
+    def board_reset(self) -> None:
+        """ Work out every index again from the pieces of the board """
+        self.table_indexes[:] = self.patterns.offsets
+        self._discs = 0
+        for row in range(self.board.rows):
+            for column in range(self.board.columns):
+                color = self.board.get_color((row, column))
+                if color != OthelloGameLogic.NONE:
+                    self.piece_placed((row, column), OthelloGameLogic.NONE, color)
+
+    def piece_placed(self, place: tuple, before_color: int, color: int) -> None:
+        """ Change the digit of the place in each pattern it is in """
+        row, column = place
+        change = color - before_color
+        for instance, digit in self.patterns.place_digits[row * self.board.columns + column]:
+            self.table_indexes[instance] += change * digit
+        if before_color == OthelloGameLogic.NONE:
+            self._discs += 1
+        elif color == OthelloGameLogic.NONE:
+            self._discs -= 1
+
+    def phase(self) -> int:
+        return self.patterns.phase(self._discs, self.weights.phases)
+
+    def black_score(self) -> float:
+        """
+        :return: The black discs less the white discs at the end of the game the weights expect
+        """
+        return float(self.weights.weights[self.phase()].take(self._view).sum())
+
+    def __call__(self, game_state: GameState) -> int:
+        """
+        The evaluation of the game state for the current turn, like OthelloSearch.evaluate. The game state
+        has to be the one of the board
+        :return: The evaluation, bigger is better for the current turn
+        """
+        score = self.black_score()
+        if game_state.turn == OthelloGameLogic.WHITE:
+            score = -score
+        if game_state.winning_condition == '<':
+            score = -score
+        return int(round(score))
+
+
+def _positions(games, rule: str, rows: int, columns: int,
+               phases: int) -> ([numpy.ndarray], [numpy.ndarray], int):
+    """
+    Replay the games through game states and find the table indexes of every position
+    :return: For each phase, the (N, instances) array of the table indexes of the positions and the (N,) array
+    of the black discs less the white discs at the end of their games, and the number of games left out
+    because a move was not possible
+    """
+    weights = PatternWeights(rows, columns, phases)
+    indexes = [[] for _ in range(phases)]
+    targets = [[] for _ in range(phases)]
+    rejected = 0
+    for settings, moves in games:
+        if settings[0] != rule or settings[1] != rows or settings[2] != columns:
+            continue
+        game_state = GameState(*settings, backend='BITBOARD')
+        evaluator = PatternEvaluator(game_state.board, weights)
+        positions = []
+        try:
+            for move in moves:
+                game_state.ending_condition_met()  # The turn is passed when the player has no moves
+                if move is None:
+                    continue
+                positions.append((evaluator.phase(), numpy.array(evaluator.table_indexes)))
+                game_state.move(move)
+        except (InvalidMoveError, TypeError, ValueError):
+            rejected += 1
+            continue
+        if not game_state.ending_condition_met():
+            continue  # Games that are not finished have no result
+
+        result = game_state.board.black_disc - game_state.board.white_disc
+        for phase, table_indexes in positions:
+            indexes[phase].append(table_indexes)
+            targets[phase].append(result)
+
+    instances = len(weights.patterns.instances)
+    return ([numpy.array(phase_indexes, dtype=numpy.int32).reshape(-1, instances) for phase_indexes in indexes],
+            [numpy.array(phase_targets, dtype=numpy.float64) for phase_targets in targets], rejected)
+
+
+def _least_squares(indexes: numpy.ndarray, targets: numpy.ndarray, size: int, regularization: float,
+                   steps: int) -> numpy.ndarray:
+    """
+    Fit the weights so the sum of the weights at the indexes of each position is its target, with ridge
+    regularization, by conjugate gradient on the normal equations. Each position adds one to each of its
+    indexes, so the products with the matrix are sums and bincounts
+    :return: (size,) array of the weights
+    """
+    weights = numpy.zeros(size)
+    if len(targets) == 0:
+        return weights
+
+    def times_matrix(values: numpy.ndarray) -> numpy.ndarray:
+        return values[indexes].sum(axis=1)
+
+    def times_transpose(values: numpy.ndarray) -> numpy.ndarray:
+        return numpy.bincount(indexes.ravel(), numpy.repeat(values, indexes.shape[1]), minlength=size)
+
+    residual = times_transpose(targets)  # The weights start at zero
+    direction = residual.copy()
+    norm = residual @ residual
+    for _ in range(steps):
+        if norm < 1e-12:
+            break
+        product = times_transpose(times_matrix(direction)) + regularization * direction
+        step = norm / (direction @ product)
+        weights += step * direction
+        residual -= step * product
+        new_norm = residual @ residual
+        direction = residual + new_norm / norm * direction
+        norm = new_norm
+    return weights
+
+
+def train(games, rule: str, rows: int, columns: int, phases: int = PHASES,
+          regularization: float = REGULARIZATION, steps: int = TRAINING_STEPS) -> PatternWeights:
+    """
+    Fit the weight tables to the results of games by least squares
+    :param games: Iterable of (settings, moves) of each game, with the GameState settings and the moves,
+    None is a pass, e.g. ((record.settings, record.move_list()) for record in OthelloRecords.GameRecordReader(path))
+    :param rule: SIMPLE or FULL, the games of the other rule are left out
+    :param rows: Rows of the board, the games of other sizes are left out
+    :param columns: Columns of the board
+    :param phases: Sets of tables
+    :param regularization: Pull toward zero weights
+    :param steps: Conjugate gradient steps for each phase
+    :return: The weights, with the games that were left out because a move was not possible in rejected
+    """
+    indexes, targets, rejected = _positions(games, rule, rows, columns, phases)
+    result = PatternWeights(rows, columns, phases)
+    result.rejected = rejected
+    for phase in range(phases):
+        result.weights[phase] = _least_squares(indexes[phase], targets[phase], result.patterns.size,
+                                               regularization, steps)
+    return result
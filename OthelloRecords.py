@@ -0,0 +1,232 @@
+# OthelloRecords.py
+#
+# This is the binary game record format, with a writer and a memory-mapped reader
+#
+# The file starts with the 8 byte file header, MAGIC and the version. Each game is then an 8 byte game
+# header followed by one byte for each move. The game header is the rule (0 SIMPLE, 1 FULL), rows, columns,
+# starting player and top left disc color (1 BLACK, 2 WHITE), winning condition (0 >, 1 <) and the number
+# of moves as a 16 bit little endian number. A move is the byte row * columns + column, and a pass is the
+# byte of the top left of the four starting places, which can never be a move.
+#
+# The writer also writes the offsets of the games as 64 bit numbers to the index file, path + '.idx',
+# which lets the reader find any game without reading the games before it.
+#
+import array
+import mmap
+import os
+import struct
+
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+
+MAGIC = b'OTHR'
+VERSION = 1
+
+_FILE_HEADER = struct.Struct('<4sB3x')
+_GAME_HEADER = struct.Struct('<BBBBBBH')
+
+_RULES = ['SIMPLE', 'FULL']
+_CONDITIONS = ['>', '<']
+_COLORS = {'B': OthelloGameLogic.BLACK, 'W': OthelloGameLogic.WHITE}
+_COLOR_NAMES = {OthelloGameLogic.BLACK: 'B', OthelloGameLogic.WHITE: 'W'}
+
+
+class InvalidRecordFile(Exception):
+    """Raises whenever a file is not a game record file"""
+    pass
+
+
+def pass_code(rows: int, columns: int) -> int:
+    """
+    :return: The byte of a pass on a board of this size
+    """
+    return (rows // 2 - 1) * columns + columns // 2 - 1
+
+
+def encode_move(move: tuple, rows: int, columns: int) -> int:
+    """
+    :param move: The (row, column) of the move, or None for a pass
+    :return: The byte of the move
+    """
+    if move is None:
+        return pass_code(rows, columns)
+    row, column = move
+    return row * columns + column
+
+
+def decode_move(code: int, rows: int, columns: int) -> tuple:
+    """
+    :param code: The byte of the move
+    :return: The (row, column) of the move, or None for a pass
+    """
+    if code == pass_code(rows, columns):
+        return None
+    return divmod(code, columns)
+
+
+class GameRecordWriter:
+    def __init__(self, path: str):
+        """
+        Writer of games to a new game record file
+        :param path: Path of the file
+        """
+        self.path = path
+        self._file = open(path, 'wb')
+        self._index_file = open(path + '.idx', 'wb')
+        self._file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+        self._offset = _FILE_HEADER.size
+
+    def write_game(self, settings: tuple, moves: [tuple]) -> None:
+        """
+        Write one game
+        :param settings: The GameState settings, rule, rows, columns, starting player, top left disc color
+        and winning condition
+        :param moves: The moves of the game, None is a pass
+        """
+        rule, rows, columns, starting_player, top_left_disc_color, winning_condition = settings
+        header = _GAME_HEADER.pack(_RULES.index(rule), rows, columns, _COLORS[starting_player],
+                                   _COLORS[top_left_disc_color], _CONDITIONS.index(winning_condition), len(moves))
+        body = bytes(encode_move(move, rows, columns) for move in moves)
+
+        self._index_file.write(struct.pack('<Q', self._offset))
+        self._file.write(header)
+        self._file.write(body)
+        self._offset += len(header) + len(body)
+
+    def close(self) -> None:
+        self._file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class GameRecord:
+    def __init__(self, settings: tuple, moves: memoryview):
+        """
+        One game of a game record file
+        :param settings: The GameState settings
+        :param moves: The bytes of the moves, a view of the file without copying
+        """
+        self.settings = settings
+        self.moves = moves
+
+    @property
+    def rows(self) -> int:
+        return self.settings[1]
+
+    @property
+    def columns(self) -> int:
+        return self.settings[2]
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def move_list(self) -> [tuple]:
+        """
+        :return: The moves of the game, None is a pass
+        """
+        return [decode_move(code, self.rows, self.columns) for code in self.moves]
+
+    def replay(self, ply: int = None, backend: str = 'LIST') -> GameState:
+        """
+        Play the game through a game state
+        :param ply: Number of moves to play, counting passes, or None for the whole game
+        :param backend: Backend of the game state
+        :return: The Othello Game State after the moves
+        """
+        game_state = GameState(*self.settings, backend=backend)
+        passing = pass_code(self.rows, self.columns)
+        for code in self.moves[:ply]:
+            if code == passing:
+                game_state.ending_condition_met()  # The turn is passed when the player has no moves
+            else:
+                game_state.move(divmod(code, self.columns))
+        return game_state
+
+
+class GameRecordReader:
+    def __init__(self, path: str):
+        """
+        Reader of a game record file, which memory maps the file and reads the games only when they are used
+        :param path: Path of the file
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        if len(self._view) < _FILE_HEADER.size:
+            raise InvalidRecordFile
+        magic, version = _FILE_HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise InvalidRecordFile
+
+        self._index_map = None
+        if os.path.exists(path + '.idx') and os.path.getsize(path + '.idx') > 0:
+            self._index_file = open(path + '.idx', 'rb')
+            self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._offsets = memoryview(self._index_map).cast('Q')
+        else:
+            self._offsets = self._scan_offsets()
+
+    def _scan_offsets(self) -> array.array:
+        """ Find the offsets of the games by reading their headers, when there is no index file """
+        offsets = array.array('Q')
+        offset = _FILE_HEADER.size
+        while offset < len(self._view):
+            offsets.append(offset)
+            offset += _GAME_HEADER.size + _GAME_HEADER.unpack_from(self._view, offset)[6]
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> GameRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        offset = self._offsets[index]
+        rule, rows, columns, starting_player, top_left, condition, length = \
+            _GAME_HEADER.unpack_from(self._view, offset)
+        settings = (_RULES[rule], rows, columns, _COLOR_NAMES[starting_player], _COLOR_NAMES[top_left],
+                    _CONDITIONS[condition])
+        start = offset + _GAME_HEADER.size
+        return GameRecord(settings, self._view[start:start + length])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def replay(self, index: int, ply: int = None, backend: str = 'LIST') -> GameState:
+        """
+        Play a game of the file through a game state
+        :param index: Index of the game
+        :param ply: Number of moves to play, counting passes, or None for the whole game
+        :param backend: Backend of the game state
+        :return: The Othello Game State after the moves
+        """
+        return self[index].replay(ply, backend)
+
+    def close(self) -> None:
+        """ Close the file, the moves of the games read before have to be released first """
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = array.array('Q')
+        self._view.release()
+        self._map.close()
+        self._file.close()
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
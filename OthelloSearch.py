@@ -0,0 +1,323 @@
+# OthelloSearch.py
+#
+# This is the computer player, a negamax alpha-beta search with iterative deepening on the game state
+#
+import time
+
+import OthelloGameLogic
+import OthelloZobrist
+from OthelloGameLogic import GameState
+
+WIN_SCORE = 1000  # Added to the disc difference of a finished game, so it is more than any evaluation
+CORNER_WEIGHT = 10  # How many discs a corner is worth in the evaluation
+_CHECK_EVERY = 1024  # How many nodes between checks of the time limit
+
+
+class SearchTimeout(Exception):
+    """Raises whenever the search ran out of time or nodes"""
+    pass
+
+
+def _opposite_color(color: int) -> int:
+    if color == OthelloGameLogic.BLACK:
+        return OthelloGameLogic.WHITE
+    else:
+        return OthelloGameLogic.BLACK
+
+
+def _empty_places(game_state: GameState) -> int:
+    board = game_state.board
+    return board.rows * board.columns - board.black_disc - board.white_disc
+
+
+def disc_difference(game_state: GameState) -> int:
+    """
+    The disc difference for the current turn, counted so that a bigger number is always better, which
+    means it is flipped when the winning condition is <
+    :param game_state: The Othello Game State
+    :return: The disc difference
+    """
+    if game_state.turn == OthelloGameLogic.BLACK:
+        difference = game_state.board.black_disc - game_state.board.white_disc
+    else:
+        difference = game_state.board.white_disc - game_state.board.black_disc
+
+    if game_state.winning_condition == '<':
+        return -difference
+    else:
+        return difference
+
+
+def final_score(game_state: GameState) -> int:
+    """
+    The score of a finished game for the current turn
+    :param game_state: The Othello Game State
+    :return: WIN_SCORE plus the disc difference for a win, minus for a loss, 0 for a draw
+    """
+    difference = disc_difference(game_state)
+    if difference > 0:
+        return WIN_SCORE + difference
+    elif difference < 0:
+        return -WIN_SCORE + difference
+    else:
+        return 0
+
+
+def evaluate(game_state: GameState) -> int:
+    """
+    Evaluation of a game that is not finished for the current turn, the disc difference with the corners
+    counting more
+    :param game_state: The Othello Game State
+    :return: The evaluation, bigger is better for the current turn
+    """
+    board = game_state.board
+    corners = 0
+    for place in ((0, 0), (0, board.columns - 1), (board.rows - 1, 0), (board.rows - 1, board.columns - 1)):
+        color = board.get_piece(place).color
+        if color == game_state.turn:
+            corners += 1
+        elif color != OthelloGameLogic.NONE:
+            corners -= 1
+
+    if game_state.winning_condition == '<':
+        corners = -corners
+    return disc_difference(game_state) + CORNER_WEIGHT * corners
+
+
+class SearchResult:
+    def __init__(self, best_move: tuple, score: int, depth: int, nodes: int, seconds: float,
+                 principal_variation: [tuple]):
+        """
+        The result of a search
+        :param best_move: The best move found, None if the current turn has to pass
+        :param score: Score of the best move for the current turn
+        :param depth: The deepest search that was finished
+        :param nodes: How many nodes were searched, counting the unfinished search
+        :param seconds: How long the search took
+        :param principal_variation: The moves expected from both players, None is a pass
+        """
+        self.best_move = best_move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.seconds = seconds
+        self.principal_variation = principal_variation
+
+    @property
+    def nodes_per_second(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.nodes / self.seconds
+
+
+class Searcher:
+    def __init__(self, evaluate_function=evaluate, transposition_table: OthelloZobrist.TranspositionTable = None):
+        """
+        The search engine, which finds the best move for the current turn of a game state
+        :param evaluate_function: Evaluation of a game state that is not finished for the current turn
+        :param transposition_table: Table of searched positions, kept between searches, or None to not use one
+        """
+        self._evaluate = evaluate_function
+        self.transposition_table = transposition_table
+        self._game_state = None
+        self._nodes = 0
+        self._node_limit = None
+        self._deadline = None
+        self._previous_pv = []
+
+    def search(self, game_state: GameState, max_depth: int = 64,
+               time_limit: float = None, node_limit: int = None, progress=None) -> SearchResult:
+        """
+        Search deeper and deeper until the max depth, time limit or node limit is reached. The game state
+        is the same after the search as before
+        :param game_state: The Othello Game State
+        :param max_depth: Deepest search in moves
+        :param time_limit: Seconds the search can take
+        :param node_limit: Nodes the search can take
+        :param progress: Function called with the SearchResult of each depth when it is finished, or None
+        :return: The result of the deepest search that was finished
+        """
+        start = time.perf_counter()
+        self._start(game_state, start, time_limit, node_limit)
+
+        root_moves = sorted(game_state.possible_moves())
+        if not root_moves:
+            return SearchResult(None, 0, 0, 0, time.perf_counter() - start, [None])
+
+        result = SearchResult(root_moves[0], 0, 0, 0, 0.0, [root_moves[0]])
+        for depth in range(1, max_depth + 1):
+            try:
+                score, pv = self._search_root(root_moves, depth)
+            except SearchTimeout:
+                break
+            result = SearchResult(pv[0], score, depth, self._nodes, time.perf_counter() - start, pv)
+            self._previous_pv = pv
+            if progress is not None:
+                progress(result)
+
+            # The best move is tried first in the next search
+            root_moves.remove(pv[0])
+            root_moves.insert(0, pv[0])
+            if depth >= _empty_places(game_state):
+                break  # The game was searched to the end
+
+        result.nodes = self._nodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    @property
+    def nodes(self) -> int:
+        """ Nodes searched by the last search """
+        return self._nodes
+
+    def score_move(self, game_state: GameState, move: tuple, depth: int, alpha: int = -WIN_SCORE * 2,
+                   beta: int = WIN_SCORE * 2, time_limit: float = None, node_limit: int = None,
+                   principal_variation: [tuple] = None) -> (int, [tuple]):
+        """
+        Search one move to the depth inside the window, for splitting the search of the root moves
+        :param game_state: The Othello Game State, which is the same after the search as before
+        :param move: The move to search
+        :param depth: Depth in moves, counting the move
+        :param alpha: The score the current turn is sure to get
+        :param beta: The score the other player is sure to get
+        :param time_limit: Seconds the search can take
+        :param node_limit: Nodes the search can take
+        :param principal_variation: The principal variation of a previous search to try first
+        :return: The score of the move for the current turn, exact if it is inside the window, and the
+        principal variation. Raises SearchTimeout if the time or nodes ran out
+        """
+        self._start(game_state, time.perf_counter(), time_limit, node_limit)
+        if principal_variation is not None:
+            self._previous_pv = principal_variation
+
+        record = game_state.make_move(move)
+        try:
+            score, pv = self._negamax(depth - 1, -beta, -alpha, 1)
+        finally:
+            game_state.unmake_move(record)
+        return -score, [move] + pv
+
+    def _start(self, game_state: GameState, start: float, time_limit: float, node_limit: int) -> None:
+        """ Get ready for a new search """
+        self._game_state = game_state
+        self._nodes = 0
+        self._node_limit = node_limit
+        self._deadline = None if time_limit is None else start + time_limit
+        self._previous_pv = []
+
+    def _search_root(self, root_moves: [tuple], depth: int) -> (int, [tuple]):
+        """
+        Search every move of the root
+        :return: The best score and the principal variation
+        """
+        alpha, beta = -WIN_SCORE * 2, WIN_SCORE * 2
+        best_pv = None
+        for move in root_moves:
+            record = self._game_state.make_move(move)
+            try:
+                score, pv = self._negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                self._game_state.unmake_move(record)
+            score = -score
+            if best_pv is None or score > alpha:
+                alpha = score
+                best_pv = [move] + pv
+        return alpha, best_pv
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int) -> (int, [tuple]):
+        """
+        Negamax alpha-beta search
+        :param depth: Moves left to search
+        :param alpha: The score the current turn is sure to get
+        :param beta: The score the other player is sure to get
+        :param ply: Moves from the root
+        :return: The score for the current turn and the principal variation
+        """
+        self._count_node()
+        game_state = self._game_state
+
+        moves = game_state.possible_moves()
+        if not moves:
+            if game_state.rule == 'SIMPLE':
+                return final_score(game_state), []
+
+            # Like ending_condition_met, the turn goes to the other player, and the game ends
+            # if the other player has no moves either
+            game_state.turn = _opposite_color(game_state.turn)
+            try:
+                if not game_state.possible_moves():
+                    score = -final_score(game_state)
+                    pv = []
+                else:
+                    score, pv = self._negamax(depth, -beta, -alpha, ply + 1)
+                    score = -score
+                    pv = [None] + pv
+            finally:
+                game_state.turn = _opposite_color(game_state.turn)
+            return score, pv
+
+        if depth <= 0:
+            return self._evaluate(game_state), []
+
+        table = self.transposition_table
+        table_move = None
+        if table is not None:
+            key = game_state.hash_key()
+            entry = table.probe(key)
+            if entry is not None:
+                table_depth, flag, score, table_move = entry
+                if table_depth >= depth and (flag == OthelloZobrist.EXACT or
+                                             (flag == OthelloZobrist.LOWER and score >= beta) or
+                                             (flag == OthelloZobrist.UPPER and score <= alpha)):
+                    return score, []
+
+        original_alpha = alpha
+        best_move = None
+        best_pv = []
+        for move in self._ordered_moves(moves, ply, table_move):
+            record = game_state.make_move(move)
+            try:
+                score, pv = self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game_state.unmake_move(record)
+            score = -score
+            if score > alpha:
+                alpha = score
+                best_move = move
+                best_pv = [move] + pv
+                if alpha >= beta:
+                    break
+
+        if table is not None:
+            if alpha <= original_alpha:
+                flag = OthelloZobrist.UPPER
+            elif alpha >= beta:
+                flag = OthelloZobrist.LOWER
+            else:
+                flag = OthelloZobrist.EXACT
+            table.store(key, depth, flag, alpha, best_move)
+        return alpha, best_pv
+
+    def _ordered_moves(self, moves: {tuple}, ply: int, table_move: tuple = None) -> [tuple]:
+        """
+        The moves in the order to search them, the move of the previous principal variation first,
+        then the best move from the transposition table, then corners, then the rest
+        """
+        board = self._game_state.board
+        corners = {(0, 0), (0, board.columns - 1), (board.rows - 1, 0), (board.rows - 1, board.columns - 1)}
+        ordered = sorted(moves, key=lambda move: (move not in corners, move))
+        if table_move in moves:
+            ordered.remove(table_move)
+            ordered.insert(0, table_move)
+        if ply < len(self._previous_pv) and self._previous_pv[ply] in moves:
+            ordered.remove(self._previous_pv[ply])
+            ordered.insert(0, self._previous_pv[ply])
+        return ordered
+
+    def _count_node(self) -> None:
+        """ Count the node and stop the search if the time or nodes ran out """
+        self._nodes += 1
+        if self._node_limit is not None and self._nodes > self._node_limit:
+            raise SearchTimeout
+        if self._deadline is not None and self._nodes % _CHECK_EVERY == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
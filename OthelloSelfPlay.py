@@ -0,0 +1,239 @@
+# OthelloSelfPlay.py
+#
+# This is the self-play game generator, which plays a batch of games at the same time with NumPy
+#
+import numpy
+
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+
+OTHER = OthelloGameLogic.BLACK + OthelloGameLogic.WHITE  # OTHER - color is the opposite color
+
+
+class SelfPlayGame:
+    def __init__(self, settings: tuple, moves: [tuple], black_disc: int, white_disc: int, winner: str):
+        """
+        A finished self-play game
+        :param settings: The GameState settings, rule, rows, columns, starting player, top left disc color
+        and winning condition
+        :param moves: The moves of the game, None is a pass
+        :param black_disc: Black pieces at the end
+        :param white_disc: White pieces at the end
+        :param winner: BLACK, WHITE or NONE, like GameState.winner
+        """
+        self.settings = settings
+        self.moves = moves
+        self.black_disc = black_disc
+        self.white_disc = white_disc
+        self.winner = winner
+
+    def replay(self) -> GameState:
+        """
+        Play the game again through a game state
+        :return: The Othello Game State at the end of the game
+        """
+        game_state = GameState(*self.settings)
+        for move in self.moves:
+            game_state.ending_condition_met()  # This is where the turn is passed
+            if move is not None:
+                game_state.move(move)
+        game_state.ending_condition_met()
+        return game_state
+
+
+def random_policy(legal: numpy.ndarray, boards: numpy.ndarray, turns: numpy.ndarray,
+                  generator: numpy.random.Generator) -> numpy.ndarray:
+    """
+    The policy that picks one of the possible moves at random. A policy gets the possible moves, the boards
+    and the turns of the games that have to move, and returns the index row * columns + column of the
+    move of each game
+    :param legal: (N, rows, columns) bool array of the possible moves
+    :param boards: (N, rows, columns) int8 array of the colors
+    :param turns: (N,) int8 array of the color of the turn
+    :param generator: NumPy random generator
+    :return: (N,) array of the moves
+    """
+    flat = legal.reshape(len(legal), -1)
+    return numpy.argmax(generator.random(flat.shape) * flat, axis=1)
+
+
+def shifted_cells(cells: numpy.ndarray, row_difference: int, column_difference: int, steps: int) -> numpy.ndarray:
+    """
+    For every cell, the value of the cell that is the steps away in the direction, False outside the board
+    :param cells: (N, rows, columns) bool array
+    :return: (N, rows, columns) bool array
+    """
+    _, rows, columns = cells.shape
+    row_distance, column_distance = row_difference * steps, column_difference * steps
+    result = numpy.zeros_like(cells)
+    if abs(row_distance) >= rows or abs(column_distance) >= columns:
+        return result
+    to_rows = slice(max(0, -row_distance), rows - max(0, row_distance))
+    to_columns = slice(max(0, -column_distance), columns - max(0, column_distance))
+    from_rows = slice(max(0, row_distance), rows - max(0, -row_distance))
+    from_columns = slice(max(0, column_distance), columns - max(0, -column_distance))
+    result[:, to_rows, to_columns] = cells[:, from_rows, from_columns]
+    return result
+
+
+def possible_moves(boards: numpy.ndarray, turns: numpy.ndarray, rule: str) -> numpy.ndarray:
+    """
+    The possible moves of every board under the rule
+    :param boards: (N, rows, columns) int8 array of the colors
+    :param turns: (N,) array of the color of the turn
+    :param rule: SIMPLE or FULL
+    :return: (N, rows, columns) bool array
+    """
+    own = boards == turns[:, None, None]
+    opponent = boards == (OTHER - turns)[:, None, None]
+    empty = boards == OthelloGameLogic.NONE
+    legal = numpy.zeros_like(empty)
+    longest = max(boards.shape[1:])  # Longest line in any direction, counting the cell past the board
+    for row_difference, column_difference in OthelloGameLogic.DIRECTIONS:
+        line = shifted_cells(opponent, row_difference, column_difference, 1)
+        if rule == 'SIMPLE':
+            legal |= line
+            continue
+        for steps in range(2, longest):
+            legal |= line & shifted_cells(own, row_difference, column_difference, steps)
+            line = line & shifted_cells(opponent, row_difference, column_difference, steps)
+            if not line.any():
+                break
+    return legal & empty
+
+
+class SelfPlay:
+    def __init__(self, rule: str, rows: int, columns: int, starting_player: str, top_left_disc_color: str,
+                 winning_condition: str, batch_size: int = 256, policy=random_policy, seed: int = None):
+        """
+        Self-play of many games at the same time, with the same settings as GameState
+        :param rule: Rules for the game, either SIMPLE or FULL
+        :param rows: How many rows there are in the game
+        :param columns: How many columns there are in the game
+        :param starting_player: Which color is the starting player
+        :param top_left_disc_color: Which color will the top left disc be
+        :param winning_condition: > for largest number of discs, < for smallest number of discs
+        :param batch_size: Games played at the same time
+        :param policy: Picks the moves, see random_policy
+        :param seed: Seed of the random generator given to the policy
+        """
+        start = GameState(rule, rows, columns, starting_player, top_left_disc_color, winning_condition)
+        self.settings = (rule, rows, columns, starting_player, top_left_disc_color, winning_condition)
+        self.rule = rule
+        self.rows = rows
+        self.columns = columns
+        self.winning_condition = winning_condition
+        self.batch_size = batch_size
+        self.policy = policy
+        self.generator = numpy.random.default_rng(seed)
+
+        self._start_board = numpy.array([[start.board.get_piece((row, column)).color for column in range(columns)]
+                                         for row in range(rows)], dtype=numpy.int8)
+        self._start_turn = start.turn
+        self._line = max(rows, columns)  # Longest line in any direction, counting the cell past the board
+
+    def games(self, count: int = None):
+        """
+        Play games and give each one as soon as it is finished
+        :param count: Number of games, or None to play forever
+        :return: Generator of SelfPlayGame
+        """
+        size = self.batch_size if count is None else min(self.batch_size, count)
+        boards = numpy.repeat(self._start_board[None], size, axis=0)
+        turns = numpy.full(size, self._start_turn, dtype=numpy.int8)
+        moves = [[] for _ in range(size)]
+        active = numpy.ones(size, dtype=bool)
+        started = size
+
+        while active.any():
+            playing = numpy.flatnonzero(active)
+            legal = self.possible_moves(boards[playing], turns[playing])
+            has_moves = legal.reshape(len(playing), -1).any(axis=1)
+
+            # Like ending_condition_met, in full rules the turn goes to the other player, and the game
+            # is over if the other player has no moves either
+            stuck = playing[~has_moves]
+            finished = stuck
+            if self.rule == 'FULL' and len(stuck):
+                other_turns = OTHER - turns[stuck]
+                other_legal = self.possible_moves(boards[stuck], other_turns)
+                passing = other_legal.reshape(len(stuck), -1).any(axis=1)
+                turns[stuck[passing]] = other_turns[passing]
+                for game in stuck[passing]:
+                    moves[game].append(None)
+                finished = stuck[~passing]
+
+            moving = has_moves.nonzero()[0]
+            if len(moving):
+                games = playing[moving]
+                chosen = numpy.asarray(self.policy(legal[moving], boards[games], turns[games], self.generator))
+                move_rows, move_columns = numpy.divmod(chosen, self.columns)
+                self._apply(boards, games, move_rows, move_columns, turns[games])
+                for game, row, column in zip(games.tolist(), move_rows.tolist(), move_columns.tolist()):
+                    moves[game].append((row, column))
+                turns[games] = OTHER - turns[games]
+
+            for game in finished.tolist():
+                yield self._record(boards[game], moves[game])
+                if count is None or started < count:
+                    started += 1
+                    boards[game] = self._start_board
+                    turns[game] = self._start_turn
+                    moves[game] = []
+                else:
+                    active[game] = False
+
+    def possible_moves(self, boards: numpy.ndarray, turns: numpy.ndarray) -> numpy.ndarray:
+        """
+        The possible moves of every board under the rule
+        :param boards: (N, rows, columns) int8 array of the colors
+        :param turns: (N,) array of the color of the turn
+        :return: (N, rows, columns) bool array
+        """
+        return possible_moves(boards, turns, self.rule)
+
+    def _apply(self, boards: numpy.ndarray, games: numpy.ndarray, move_rows: numpy.ndarray,
+               move_columns: numpy.ndarray, turns: numpy.ndarray) -> None:
+        """ Make one move in each of the games """
+        if self.rule == 'SIMPLE':
+            # The move and every cell around it become the color of the turn
+            for row_difference in (-1, 0, 1):
+                for column_difference in (-1, 0, 1):
+                    rows = move_rows + row_difference
+                    columns = move_columns + column_difference
+                    inside = (rows >= 0) & (rows < self.rows) & (columns >= 0) & (columns < self.columns)
+                    boards[games[inside], rows[inside], columns[inside]] = turns[inside]
+            return
+
+        steps = numpy.arange(1, self._line)
+        flips = []
+        for row_difference, column_difference in OthelloGameLogic.DIRECTIONS:
+            rows = move_rows[:, None] + steps * row_difference
+            columns = move_columns[:, None] + steps * column_difference
+            inside = (rows >= 0) & (rows < self.rows) & (columns >= 0) & (columns < self.columns)
+            colors = numpy.where(inside, boards[games[:, None], rows.clip(0, self.rows - 1),
+                                                columns.clip(0, self.columns - 1)], OthelloGameLogic.NONE)
+
+            # The line is the opponent pieces up to the first other cell, flipped if that cell is the turn's
+            is_opponent = colors == (OTHER - turns)[:, None]
+            run = numpy.argmin(is_opponent, axis=1)
+            closed = colors[numpy.arange(len(games)), run] == turns
+            flipped = (steps[None, :] <= run[:, None]) & closed[:, None] & is_opponent
+            flips.append((rows, columns, flipped))
+
+        boards[games, move_rows, move_columns] = turns
+        for rows, columns, flipped in flips:
+            which, _ = flipped.nonzero()
+            boards[games[which], rows[flipped], columns[flipped]] = turns[which]
+
+    def _record(self, board: numpy.ndarray, moves: [tuple]) -> SelfPlayGame:
+        """ The record of a finished game, with the winner found like GameState does """
+        black_disc = int((board == OthelloGameLogic.BLACK).sum())
+        white_disc = int((board == OthelloGameLogic.WHITE).sum())
+        if black_disc == white_disc:
+            winner = 'NONE'
+        elif (black_disc > white_disc) == (self.winning_condition == '>'):
+            winner = 'BLACK'
+        else:
+            winner = 'WHITE'
+        return SelfPlayGame(self.settings, moves, black_disc, white_disc, winner)
@@ -0,0 +1,218 @@
+# OthelloSymmetry.py
+#
+# This is the canonical form of the positions under the symmetries of the board, and the cache that uses it
+#
+# A square board has 8 symmetries, the rotations and the reflections, and any other board has 4, the half
+# turn and the reflections across the middle row and column. A symmetry only moves the pieces, it never
+# swaps the colors, so the top left disc color of the game is never changed by it.
+#
+# The symmetries work on the black and white bits of OthelloBitboard.board_bits, a byte of the bits at a
+# time through tables made once for each board size. The cache looks a position up by its Zobrist key first,
+# and only works out the canonical form when the position itself is not in the cache.
+#
+import collections
+import functools
+
+import OthelloBitboard
+import OthelloSearch
+from OthelloGameLogic import GameState
+
+DEFAULT_CAPACITY = 65536  # Positions kept by the cache
+
+
+class Symmetry:
+    def __init__(self, name: str, rows: int, columns: int, transform):
+        """
+        One symmetry of a board size
+        :param name: Name of the symmetry
+        :param transform: Function of (row, column) to the (row, column) the place is moved to
+        """
+        self.name = name
+        places = [(row, column) for row in range(rows) for column in range(columns)]
+        self._forward = {place: transform(*place) for place in places}
+        self._inverse = {moved: place for place, moved in self._forward.items()}
+
+        # For each byte of the bits, the moved bits of each of its 256 values
+        self._byte_tables = []
+        for start in range(0, rows * columns, 8):
+            targets = [OthelloBitboard.bit_of(self._forward[divmod(index, columns)], columns)
+                       for index in range(start, min(start + 8, rows * columns))]
+            table = [0] * 256
+            for value in range(1, 256):
+                lowest = (value & -value).bit_length() - 1
+                table[value] = table[value & (value - 1)] | (targets[lowest] if lowest < len(targets) else 0)
+            self._byte_tables.append(tuple(table))
+
+    def forward(self, place: tuple) -> tuple:
+        """
+        :return: Where the place is moved to by the symmetry
+        """
+        return self._forward[place]
+
+    def inverse(self, place: tuple) -> tuple:
+        """
+        :return: The place that the symmetry moves to this place
+        """
+        return self._inverse[place]
+
+    def apply(self, bits: int) -> int:
+        """
+        :param bits: Bits of the places, bit row * columns + column
+        :return: The bits of the moved places
+        """
+        result = 0
+        for table in self._byte_tables:
+            result |= table[bits & 255]
+            bits >>= 8
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def symmetries(rows: int, columns: int) -> tuple:
+    """
+    :return: The symmetries of the board size, the identity first, which are only made once for each size
+    """
+    last_row, last_column = rows - 1, columns - 1
+    result = [
+        Symmetry('identity', rows, columns, lambda row, column: (row, column)),
+        Symmetry('rotate 180', rows, columns, lambda row, column: (last_row - row, last_column - column)),
+        Symmetry('flip rows', rows, columns, lambda row, column: (last_row - row, column)),
+        Symmetry('flip columns', rows, columns, lambda row, column: (row, last_column - column)),
+    ]
+    if rows == columns:
+        result += [
+            Symmetry('rotate 90', rows, columns, lambda row, column: (column, last_row - row)),
+            Symmetry('rotate 270', rows, columns, lambda row, column: (last_column - column, row)),
+            Symmetry('transpose', rows, columns, lambda row, column: (column, row)),
+            Symmetry('anti-transpose', rows, columns, lambda row, column: (last_column - column, last_row - row)),
+        ]
+    return tuple(result)
+
+
+def canonical_form(board) -> ((int, int), Symmetry):
+    """
+    The canonical form of a position is the smallest of its moved positions, so every position that is the
+    same under a symmetry has the same canonical form
+    :param board: The game board, of any backend
+    :return: Tuple of the black and white bits of the canonical form and the symmetry that moves the position
+    to it
+    """
+    black, white = OthelloBitboard.board_bits(board)
+    best, best_symmetry = None, None
+    for symmetry in symmetries(board.rows, board.columns):
+        moved = (symmetry.apply(black), symmetry.apply(white))
+        if best_symmetry is None or moved < best:
+            best, best_symmetry = moved, symmetry
+    return best, best_symmetry
+
+
+class PositionCache:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, evaluate_function=OthelloSearch.evaluate):
+        """
+        The least recently used cache of the evaluations and the possible moves of the positions, by their
+        canonical form, so that a position is worked out once for all of its symmetries. Each position is also
+        kept by its Zobrist key, so that looking up a position that was seen before costs one dictionary lookup
+        :param capacity: Entries kept in each table, the least recently used one is thrown out after that
+        :param evaluate_function: The evaluation, which has to give the same score to every symmetry of a
+        position, like OthelloSearch.evaluate
+        """
+        self.capacity = capacity
+        self.evaluate_function = evaluate_function
+        self._evaluations = collections.OrderedDict()
+        self._moves = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _position_key(game_state: GameState) -> tuple:
+        """
+        :return: The key of the position itself, the Zobrist key has the turn, the rule and the winning condition
+        """
+        return game_state.board.rows, game_state.board.columns, game_state.hash_key()
+
+    @staticmethod
+    def _canonical_key(game_state: GameState) -> (tuple, Symmetry):
+        bits, symmetry = canonical_form(game_state.board)
+        key = (game_state.rule, game_state.winning_condition, game_state.board.rows, game_state.board.columns,
+               game_state.turn, bits)
+        return key, symmetry
+
+    def _lookup(self, table: collections.OrderedDict, key: tuple):
+        """
+        :return: The cached value, or None if there is none
+        """
+        value = table.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        table.move_to_end(key)
+        return value
+
+    def _store(self, table: collections.OrderedDict, key: tuple, value) -> None:
+        table[key] = value
+        if len(table) > self.capacity:
+            table.popitem(last=False)
+            self.evictions += 1
+
+    def evaluate(self, game_state: GameState) -> int:
+        """
+        :param game_state: The Othello Game State
+        :return: The evaluation of the evaluate function
+        """
+        position_key = self._position_key(game_state)
+        score = self._evaluations.get(position_key)
+        if score is not None:
+            self.hits += 1
+            self._evaluations.move_to_end(position_key)
+            return score
+
+        key, _ = self._canonical_key(game_state)
+        score = self._lookup(self._evaluations, key)
+        if score is None:
+            score = self.evaluate_function(game_state)
+            self._store(self._evaluations, key, score)
+        self._store(self._evaluations, position_key, score)
+        return score
+
+    def possible_moves(self, game_state: GameState) -> set:
+        """
+        The possible moves, kept in the canonical form and moved back through the symmetry of the position
+        :param game_state: The Othello Game State
+        :return: Set of the possible moves
+        """
+        position_key = self._position_key(game_state)
+        moves = self._moves.get(position_key)
+        if moves is not None:
+            self.hits += 1
+            self._moves.move_to_end(position_key)
+            return set(moves)
+
+        key, symmetry = self._canonical_key(game_state)
+        moves = self._lookup(self._moves, key)
+        if moves is None:
+            found = set(game_state.possible_moves())
+            self._store(self._moves, key, frozenset(symmetry.forward(move) for move in found))
+        else:
+            found = {symmetry.inverse(move) for move in moves}
+        self._store(self._moves, position_key, frozenset(found))
+        return found
+
+    def clear(self) -> None:
+        self._evaluations.clear()
+        self._moves.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit_rate(self) -> float:
+        """
+        :return: The share of lookups that were found in the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hit_rate(), 'evaluations': len(self._evaluations), 'moves': len(self._moves)}
@@ -0,0 +1,125 @@
+# OthelloZobrist.py
+#
+# This is the Zobrist hashing of the game positions, and the transposition table the search keeps them in
+#
+import array
+import random
+
+MAX_CELLS = 16 * 16  # The cell (row, column) has the key of index row * 16 + column, on any board size
+
+_random = random.Random(45298461)  # The keys have to be the same every time, so that saved keys can be used again
+
+# Keys of every cell, first by the color of the game logic (NONE = 0, BLACK = 1, WHITE = 2) then by the index.
+# NONE has no key, so an empty cell does not change the key
+PIECE_KEYS = ([0] * MAX_CELLS,
+              [_random.getrandbits(64) for _ in range(MAX_CELLS)],
+              [_random.getrandbits(64) for _ in range(MAX_CELLS)])
+WHITE_TURN_KEY = _random.getrandbits(64)
+SIMPLE_RULE_KEY = _random.getrandbits(64)
+LESS_WINS_KEY = _random.getrandbits(64)
+
+EXACT = 0  # The score is the score of the position
+LOWER = 1  # The score is at least the stored score
+UPPER = 2  # The score is at most the stored score
+
+ENTRY_SIZE = 16  # Bytes of one entry, 8 for the key, 1 for depth, 1 for the flag, 4 for the score and 2 for the move
+_EMPTY = -1  # Depth of an empty entry
+
+
+def cell_index(place: tuple) -> int:
+    """
+    :param place: The (row, column) of the cell
+    :return: The index of the cell in the keys
+    """
+    row, column = place
+    return row * 16 + column
+
+
+class TranspositionTable:
+    def __init__(self, memory_size: int = 16 * 1024 * 1024):
+        """
+        The table of searched positions with a fixed number of entries. An entry is replaced by a search
+        of the same depth or deeper
+        :param memory_size: Bytes the table can use
+        """
+        capacity = 1
+        while capacity * 2 * ENTRY_SIZE <= memory_size:
+            capacity *= 2
+        self.capacity = capacity
+        self._mask = capacity - 1
+
+        self._keys = array.array('Q', [0]) * capacity
+        self._depths = array.array('b', [_EMPTY]) * capacity
+        self._flags = array.array('B', [0]) * capacity
+        self._scores = array.array('i', [0]) * capacity
+        self._moves = array.array('h', [-1]) * capacity
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0  # Stores that took the entry of another position
+        self.rejections = 0  # Stores that were not made because the entry was searched deeper
+
+    def probe(self, key: int) -> (int, int, int, tuple):
+        """
+        Find the position in the table
+        :param key: The Zobrist key of the position
+        :return: Tuple of the depth, flag, score and best move, or None if the position is not in the table
+        """
+        index = key & self._mask
+        if self._depths[index] != _EMPTY and self._keys[index] == key:
+            self.hits += 1
+            move = self._moves[index]
+            if move < 0:
+                move = None
+            else:
+                move = divmod(move, 16)
+            return self._depths[index], self._flags[index], self._scores[index], move
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score: int, move: tuple) -> None:
+        """
+        Put the position in the table, unless its entry has a deeper search of another position
+        :param key: The Zobrist key of the position
+        :param depth: Depth the position was searched to
+        :param flag: EXACT, LOWER or UPPER
+        :param score: Score of the position
+        :param move: The best move, or None
+        """
+        index = key & self._mask
+        stored_depth = self._depths[index]
+        if stored_depth != _EMPTY and self._keys[index] != key:
+            if depth < stored_depth:
+                self.rejections += 1
+                return
+            self.replacements += 1
+
+        self.stores += 1
+        self._keys[index] = key
+        self._depths[index] = min(depth, 127)
+        self._flags[index] = flag
+        self._scores[index] = score
+        self._moves[index] = -1 if move is None else cell_index(move)
+
+    def clear(self) -> None:
+        """ Empty the table and the counters """
+        self._depths = array.array('b', [_EMPTY]) * self.capacity
+        self.hits = self.misses = self.stores = self.replacements = self.rejections = 0
+
+    def hit_rate(self) -> float:
+        """
+        :return: The part of the probes that found the position
+        """
+        probes = self.hits + self.misses
+        if probes == 0:
+            return 0.0
+        return self.hits / probes
+
+    def stats(self) -> dict:
+        """
+        :return: The counters of the table
+        """
+        return {'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate(), 'stores': self.stores,
+                'replacements': self.replacements, 'rejections': self.rejections}
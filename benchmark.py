@@ -0,0 +1,175 @@
+# benchmark.py
+#
+# This is the benchmark of the game logic, which prints the results as JSON so they can be compared
+#
+import argparse
+import copy
+import json
+import platform
+import random
+import sys
+import time
+
+import OthelloSearch
+import OthelloSymmetry
+import perft
+from OthelloGameLogic import GameState
+
+SIZES = [4, 8, 16]
+RULES = ['SIMPLE', 'FULL']
+PERFT_DEPTHS = {('SIMPLE', 4): 6, ('SIMPLE', 8): 3, ('SIMPLE', 16): 3,
+                ('FULL', 4): 8, ('FULL', 8): 5, ('FULL', 16): 4}
+
+
+def new_game(rule: str, size: int, backend: str) -> GameState:
+    """
+    :return: A new game of the size, with black starting and the top left disc white like the usual game
+    """
+    return GameState(rule, size, size, 'B', 'W', '>', backend=backend)
+
+
+def random_positions(rule: str, size: int, backend: str, count: int, seed: int) -> [GameState]:
+    """
+    Positions reached by random moves, the same positions for the same seed
+    :return: List of game states that are not finished
+    """
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game_state = new_game(rule, size, backend)
+        plies = generator.randint(0, size * size // 2)
+        for _ in range(plies):
+            if game_state.ending_condition_met():
+                break
+            game_state.move(generator.choice(sorted(game_state.possible_moves())))
+        if not game_state.ending_condition_met():
+            positions.append(game_state)
+    return positions
+
+
+def _timed(function, arguments: list, repeat: int) -> dict:
+    """
+    Time the function on each of the arguments
+    :return: Dictionary of the calls, seconds and calls per second
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for argument in arguments:
+            function(argument)
+    seconds = time.perf_counter() - start
+    calls = repeat * len(arguments)
+    return {'calls': calls, 'seconds': seconds, 'per_second': calls / seconds if seconds > 0 else 0.0}
+
+
+def bench_methods(rule: str, size: int, backend: str, positions: int, repeat: int, seed: int) -> dict:
+    """ Time the methods of the game state on the random positions """
+    states = random_positions(rule, size, backend, positions, seed)
+    result = {
+        'full_possible_moves': _timed(GameState.full_possible_moves, states, repeat),
+        'simple_possible_moves': _timed(GameState.simple_possible_moves, states, repeat),
+    }
+
+    # ending_condition_met can pass the turn and a move changes the game state, so each call is made on its
+    # own copy and every call measures one of the same positions
+    copies = [copy.deepcopy(game_state) for _ in range(repeat) for game_state in states]
+    result['ending_condition_met'] = _timed(GameState.ending_condition_met, copies, 1)
+    copies = []
+    for _ in range(repeat):
+        for game_state in states:
+            copies.append((copy.deepcopy(game_state), sorted(game_state.possible_moves())[0]))
+    result['move'] = _timed(lambda pair: pair[0].move(pair[1]), copies, 1)
+    return result
+
+
+def bench_position_cache(rule: str, size: int, backend: str, positions: int, repeat: int, seed: int) -> dict:
+    """ Time the hits of the position cache against working the possible moves and evaluation out again """
+    states = random_positions(rule, size, backend, positions, seed)
+    cache = OthelloSymmetry.PositionCache()
+    for game_state in states:
+        cache.possible_moves(game_state)
+        cache.evaluate(game_state)
+    return {
+        'possible_moves_hit': _timed(cache.possible_moves, states, repeat),
+        'possible_moves_direct': _timed(GameState.possible_moves, states, repeat),
+        'evaluate_hit': _timed(cache.evaluate, states, repeat),
+        'evaluate_direct': _timed(OthelloSearch.evaluate, states, repeat),
+    }
+
+
+def bench_perft(rule: str, size: int, backend: str, depth: int) -> dict:
+    """ Count and time the games to the depth from the start """
+    game_state = new_game(rule, size, backend)
+    start = time.perf_counter()
+    count = perft.perft(game_state, depth)
+    seconds = time.perf_counter() - start
+    return {'depth': depth, 'count': count, 'seconds': seconds,
+            'per_second': count / seconds if seconds > 0 else 0.0}
+
+
+def bench_games(rule: str, size: int, backend: str, games: int, seed: int) -> dict:
+    """ Play random games to the end and time them """
+    generator = random.Random(seed)
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        game_state = new_game(rule, size, backend)
+        while not game_state.ending_condition_met():
+            game_state.move(generator.choice(sorted(game_state.possible_moves())))
+            moves += 1
+    seconds = time.perf_counter() - start
+    return {'games': games, 'moves': moves, 'seconds': seconds,
+            'games_per_second': games / seconds if seconds > 0 else 0.0}
+
+
+def run(backend: str, sizes: [int], positions: int, repeat: int, games: int, perft_depth: int, seed: int) -> dict:
+    """
+    Run every benchmark
+    :param perft_depth: Depth of perft, or None for the depth of PERFT_DEPTHS
+    :return: The results
+    """
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': backend,
+        'seed': seed,
+        'results': {},
+    }
+    for rule in RULES:
+        for size in sizes:
+            depth = perft_depth if perft_depth is not None else PERFT_DEPTHS.get((rule, size), 3)
+            results['results']['{} {}x{}'.format(rule, size, size)] = {
+                'methods': bench_methods(rule, size, backend, positions, repeat, seed),
+                'position_cache': bench_position_cache(rule, size, backend, positions, repeat, seed),
+                'perft': bench_perft(rule, size, backend, depth),
+                'games': bench_games(rule, size, backend, games, seed),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the Othello game logic')
+    parser.add_argument('--backend', default='LIST', choices=['LIST', 'COMPACT', 'BITBOARD'])
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='Board sizes, separated by commas')
+    parser.add_argument('--positions', type=int, default=20, help='Random positions of each size')
+    parser.add_argument('--repeat', type=int, default=5, help='Times each method is called on each position')
+    parser.add_argument('--games', type=int, default=5, help='Random games of each size')
+    parser.add_argument('--perft-depth', type=int, default=None, help='Depth of perft for every size')
+    parser.add_argument('--seed', type=int, default=45298461)
+    parser.add_argument('--output', default=None, help='File to write the JSON to, instead of printing it')
+    arguments = parser.parse_args()
+
+    sizes = [int(size) for size in arguments.sizes.split(',')]
+    results = run(arguments.backend, sizes, arguments.positions, arguments.repeat, arguments.games,
+                  arguments.perft_depth, arguments.seed)
+
+    if arguments.output is None:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
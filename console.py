@@ -3,12 +3,27 @@
 #
 # This is the module that will get user inputs through console commands
 #
+# With --batch, it plays many games from a file or stdin instead. Each game is a settings line, the rule,
+# rows, columns, starting player, top left disc color and winning condition separated by spaces, then a
+# line of moves as row,column starting at 1. For each game one line is written, the number of the game and
+# its winner and pieces, or the first error followed by the board where it happened.
+#
+
+import argparse
+import sys
 
 import OthelloGameLogic
 from OthelloGameLogic import GameState
 from OthelloGameLogic import InvalidMoveError
+from OthelloGameLogic import NothingToUndoError
 from OthelloGameLogic import OddColRowNumber
 
+BATCH_BACKEND = 'BITBOARD'  # Backend of the games of the batch mode, the fastest for whole games
+BATCH_BUFFER = 10000  # Lines of output kept before they are written in the batch mode
+BATCH_RULES = ('SIMPLE', 'FULL')
+BATCH_COLORS = ('B', 'W')
+BATCH_WINNING_CONDITIONS = ('>', '<')
+
 
 def print_game_pieces(game_state: GameState) -> None:
     """
@@ -28,6 +43,15 @@ def print_game_board(game_state: GameState) -> None:
     Print the board of the current game_state
     :param game_state: The Othello Game State
     """
+    print(game_board_text(game_state))
+
+
+def game_board_text(game_state: GameState) -> str:
+    """
+    The board of the current game_state as it is printed
+    :param game_state: The Othello Game State
+    :return: The rows of the board, one on each line
+    """
     rows = game_state.board.rows
     columns = game_state.board.columns
     game_board = game_state.board
@@ -47,7 +71,7 @@ def print_game_board(game_state: GameState) -> None:
             result += '\n'
             counter += 1
 
-    print(result)
+    return result
 
 
 def print_turn(game_state: GameState) -> None:
@@ -88,11 +112,15 @@ def start_game() -> GameState:
 
 def input_piece(game_state: GameState) -> None:
     """
-    Input user moves into the game state
+    Input user moves into the game state, or UNDO to take back the last move
     :param game_state: The Othello Game State
     """
     user_input = input()
 
+    if user_input.strip() == 'UNDO':
+        game_state.undo()
+        return
+
     split = user_input.split()
 
     row = int(split[0]) - 1
@@ -114,11 +142,87 @@ def play_game(game_state: GameState) -> None:
             input_piece(game_state)
             print('VALID')
             break
-        except InvalidMoveError:
+        except (InvalidMoveError, NothingToUndoError):
             print('INVALID')
 
 
+def play_batch_game(settings_line: str, moves_line: str) -> str:
+    """
+    Play one game of the batch mode
+    :param settings_line: The settings of the game
+    :param moves_line: The moves of the game
+    :return: The result of the game, or the first error and the board where it happened
+    """
+    settings = settings_line.split()
+    try:
+        rules, rows, columns, starting_player, top_left_color_disc, winning_condition = settings
+        rows, columns = int(rows), int(columns)
+        if rules not in BATCH_RULES or starting_player not in BATCH_COLORS or \
+                top_left_color_disc not in BATCH_COLORS or winning_condition not in BATCH_WINNING_CONDITIONS or \
+                rows <= 0 or columns <= 0:
+            return 'INVALID SETTINGS'
+        game_state = GameState(rules, rows, columns, starting_player, top_left_color_disc,
+                               winning_condition, backend=BATCH_BACKEND)
+    except OddColRowNumber:
+        return 'ODD COLUMN OR ROW NUMBER'
+    except (ValueError, KeyError, IndexError):
+        return 'INVALID SETTINGS'
+
+    for number, word in enumerate(moves_line.split(), 1):
+        if game_state.ending_condition_met():
+            return 'GAME OVER AT MOVE {} {}\n{}'.format(number, word, game_board_text(game_state))
+        try:
+            row, column = word.split(',')
+            row, column = int(row) - 1, int(column) - 1
+            if not (0 <= row < rows and 0 <= column < columns):
+                raise InvalidMoveError
+            game_state.move((row, column))
+        except (ValueError, InvalidMoveError):
+            return 'INVALID AT MOVE {} {}\n{}'.format(number, word, game_board_text(game_state))
+
+    if not game_state.ending_condition_met():
+        return 'UNFINISHED B: {} W: {}'.format(game_state.board.black_disc, game_state.board.white_disc)
+    return '{} B: {} W: {}'.format(game_state.winner, game_state.board.black_disc, game_state.board.white_disc)
+
+
+def play_batch(input_file, output_file) -> int:
+    """
+    Play every game of the input and write their results
+    :param input_file: The file of the games
+    :param output_file: The file the results are written to
+    :return: Number of games
+    """
+    buffer = []
+    games = 0
+    lines = iter(input_file)
+    for settings_line in lines:
+        if not settings_line.strip():
+            continue  # Empty lines between games are left out, the moves line of a game can be empty
+        moves_line = next(lines, '')
+        games += 1
+        buffer.append('{} {}'.format(games, play_batch_game(settings_line, moves_line)))
+        if len(buffer) >= BATCH_BUFFER:
+            output_file.write('\n'.join(buffer) + '\n')
+            buffer = []
+    if buffer:
+        output_file.write('\n'.join(buffer) + '\n')
+    return games
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Othello in the console')
+    parser.add_argument('--batch', nargs='?', const='-', default=None,
+                        help='Play the games of the file, or of stdin if no file is given, without asking')
+    arguments = parser.parse_args()
+    if arguments.batch is not None:
+        if arguments.batch == '-':
+            play_batch(sys.stdin, sys.stdout)
+        else:
+            with open(arguments.batch) as file:
+                play_batch(file, sys.stdout)
+        sys.stdout.flush()
+        return
+
     game_state = start_game()
     while game_state.ending_condition_met() is False:
         play_game(game_state)
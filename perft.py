@@ -0,0 +1,173 @@
+# perft.py
+#
+# This is the perft tool, which counts the games of each depth to check the rules of the game logic
+#
+# A pass counts as a move, and a finished game counts as one game at any depth, the same way as
+# GameState.ending_condition_met() passes the turn and ends the game. The counts are kept in the cache
+# file, by the position and the depth, so a count is only worked out once.
+#
+import argparse
+import json
+import os
+import time
+
+import OthelloCodec
+import OthelloGameLogic
+from OthelloGameLogic import GameState
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perft_cache.json')  # Next to this module
+
+
+def _pass_turn(game_state: GameState) -> None:
+    game_state.turn = OthelloGameLogic.BLACK + OthelloGameLogic.WHITE - game_state.turn
+
+
+def perft(game_state: GameState, depth: int) -> int:
+    """
+    Count the games of the depth. The moves of the last move are counted without making them
+    :param game_state: The Othello Game State, which is the same after the count as before
+    :param depth: Moves to play
+    :return: Number of games
+    """
+    if depth == 0:
+        return 1
+    moves = game_state.possible_moves()
+    if not moves:
+        if game_state.rule == 'SIMPLE':
+            return 1
+        _pass_turn(game_state)
+        try:
+            if not game_state.possible_moves():
+                return 1
+            return perft(game_state, depth - 1)
+        finally:
+            _pass_turn(game_state)
+
+    if depth == 1:
+        return len(moves)
+    count = 0
+    for move in moves:
+        record = game_state.make_move(move)
+        count += perft(game_state, depth - 1)
+        game_state.unmake_move(record)
+    return count
+
+
+def divide(game_state: GameState, depth: int) -> dict:
+    """
+    Count the games of the depth after each move
+    :param game_state: The Othello Game State, which is the same after the count as before
+    :param depth: Moves to play, at least 1
+    :return: Dictionary of each move to its number of games, with None for a pass, and empty when the game
+    is finished
+    """
+    moves = game_state.possible_moves()
+    if not moves:
+        if game_state.rule == 'SIMPLE':
+            return {}
+        _pass_turn(game_state)
+        try:
+            if not game_state.possible_moves():
+                return {}
+            return {None: perft(game_state, depth - 1)}
+        finally:
+            _pass_turn(game_state)
+
+    counts = {}
+    for move in sorted(moves):
+        record = game_state.make_move(move)
+        counts[move] = perft(game_state, depth - 1)
+        game_state.unmake_move(record)
+    return counts
+
+
+def _move_name(move: tuple) -> str:
+    """
+    :return: The move as row,column starting at 1, or PASS
+    """
+    if move is None:
+        return 'PASS'
+    return '{},{}'.format(move[0] + 1, move[1] + 1)
+
+
+class PerftCache:
+    def __init__(self, path: str = CACHE_PATH):
+        """
+        The counts of earlier runs, kept in a JSON file by the position and the depth
+        :param path: Path of the file, which is made when the cache is saved
+        """
+        self.path = path
+        self._counts = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                self._counts = json.load(file)
+
+    @staticmethod
+    def _key(game_state: GameState, depth: int) -> str:
+        return '{} {}'.format(OthelloCodec.encode(game_state).hex(), depth)
+
+    def get(self, game_state: GameState, depth: int) -> dict:
+        """
+        :return: The count and the divide of each move by name, or None if they were not worked out before
+        """
+        return self._counts.get(self._key(game_state, depth))
+
+    def put(self, game_state: GameState, depth: int, result: dict) -> None:
+        """
+        :param result: The count and the divide of each move by name
+        """
+        self._counts[self._key(game_state, depth)] = result
+
+    def save(self) -> None:
+        with open(self.path, 'w') as file:
+            json.dump(self._counts, file, indent=1, sort_keys=True)
+
+
+def run(game_state: GameState, depth: int, cache: PerftCache = None) -> dict:
+    """
+    Count the games of the depth, from the cache if it has them
+    :param cache: The cache, or None to always count
+    :return: The count and the divide of each move by name
+    """
+    if depth == 0:
+        return {'count': 1, 'divide': {}}
+    result = None if cache is None else cache.get(game_state, depth)
+    if result is None:
+        counts = divide(game_state, depth)
+        result = {'count': sum(counts.values()) if counts else 1,
+                  'divide': {_move_name(move): count for move, count in counts.items()}}
+        if cache is not None:
+            cache.put(game_state, depth, result)
+            cache.save()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count the games of each depth from the start of a game')
+    parser.add_argument('--rule', default='FULL', choices=['SIMPLE', 'FULL'])
+    parser.add_argument('--rows', type=int, default=8)
+    parser.add_argument('--columns', type=int, default=8)
+    parser.add_argument('--starting-player', default='B', choices=['B', 'W'])
+    parser.add_argument('--top-left', default='W', choices=['B', 'W'])
+    parser.add_argument('--backend', default='BITBOARD', choices=['LIST', 'COMPACT', 'BITBOARD'])
+    parser.add_argument('--depth', type=int, default=6, help='Deepest depth, every depth up to it is counted')
+    parser.add_argument('--divide', action='store_true', help='Print the count after each move of the deepest depth')
+    parser.add_argument('--cache', default=CACHE_PATH, help='Path of the cache file')
+    parser.add_argument('--no-cache', action='store_true', help='Count again without the cache')
+    arguments = parser.parse_args()
+
+    game_state = GameState(arguments.rule, arguments.rows, arguments.columns, arguments.starting_player,
+                           arguments.top_left, '>', backend=arguments.backend)
+    cache = None if arguments.no_cache else PerftCache(arguments.cache)
+    for depth in range(1, arguments.depth + 1):
+        start = time.perf_counter()
+        result = run(game_state, depth, cache)
+        print('depth {} count {} seconds {:.3f}'.format(depth, result['count'], time.perf_counter() - start))
+
+    if arguments.divide:
+        for move, count in result['divide'].items():
+            print('{} {}'.format(move, count))
+
+
+if __name__ == '__main__':
+    main()
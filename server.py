@@ -0,0 +1,317 @@
+# server.py
+#
+# This is the game server, which hosts many games at once for clients over TCP or a Unix socket
+#
+# Every request is one line of JSON with an "op", and every response is one line of JSON with "ok":
+#   {"op": "create", "rule": "FULL", "rows": 8, "columns": 8, "starting_player": "B",
+#    "top_left_disc_color": "W", "winning_condition": ">"}
+#   {"op": "move", "session": 1, "row": 2, "column": 3}      rows and columns start at 0
+#   {"op": "ai", "session": 1, "time_limit": 1.0, "play": true}
+#   {"op": "undo", "session": 1}
+#   {"op": "query", "session": 1}
+#   {"op": "close", "session": 1}
+#   {"op": "stats"}
+#
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import math
+import time
+
+import OthelloCodec
+import OthelloGameLogic
+import OthelloSearch
+from OthelloGameLogic import GameState, InvalidMoveError, NothingToUndoError, OddColRowNumber
+
+BACKEND = 'COMPACT'  # Backend of the game states of the sessions, which keeps thousands of them small
+LATENCY_SAMPLES = 10000  # Latencies kept for each operation to work out the percentiles
+RULES = ('SIMPLE', 'FULL')
+COLORS = ('B', 'W')
+WINNING_CONDITIONS = ('>', '<')
+
+
+class RequestError(Exception):
+    """Raises whenever a request can not be done, with the error for the client"""
+    pass
+
+
+def _integer(request: dict, name: str, default: int = None) -> int:
+    """
+    :return: The field of the request, which has to be a whole number, not a bool or a float
+    """
+    value = request.get(name, default)
+    if type(value) is not int:
+        raise RequestError('BAD REQUEST')
+    return value
+
+
+def _seconds(request: dict, name: str, default: float) -> float:
+    """
+    :return: The field of the request, which has to be a finite number of seconds more than 0
+    """
+    value = request.get(name, default)
+    if type(value) not in (int, float) or not math.isfinite(value) or value <= 0:
+        raise RequestError('BAD REQUEST')
+    return float(value)
+
+
+def _search_position(position: tuple, time_limit: float, max_depth: int) -> tuple:
+    """
+    Search a position in a process of the executor
+    :param position: The position from OthelloCodec.encode
+    :return: Tuple of the best move, score, depth, nodes and nodes per second
+    """
+    game_state = OthelloCodec.decode(position)
+    result = OthelloSearch.Searcher().search(game_state, max_depth=max_depth, time_limit=time_limit)
+    return result.best_move, result.score, result.depth, result.nodes, result.nodes_per_second
+
+
+class LatencyStats:
+    def __init__(self):
+        """ The latency of every operation of the server """
+        self._counts = collections.Counter()
+        self._totals = collections.Counter()
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_SAMPLES))
+
+    def add(self, operation: str, seconds: float) -> None:
+        self._counts[operation] += 1
+        self._totals[operation] += seconds
+        self._samples[operation].append(seconds)
+
+    def report(self) -> dict:
+        """
+        :return: For each operation, the count and the mean, median, 99th percentile and max in milliseconds
+        """
+        report = {}
+        for operation, samples in self._samples.items():
+            ordered = sorted(samples)
+            report[operation] = {
+                'count': self._counts[operation],
+                'mean_ms': self._totals[operation] / self._counts[operation] * 1000,
+                'p50_ms': ordered[len(ordered) // 2] * 1000,
+                'p99_ms': ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)] * 1000,
+                'max_ms': ordered[-1] * 1000,
+            }
+        return report
+
+
+class Session:
+    def __init__(self, game_state: GameState):
+        """ One game hosted by the server """
+        self.game_state = game_state
+        self.lock = asyncio.Lock()  # One request of a session at a time, so a search sees the same game
+        self.finished = False
+        self.closed = False
+        self.update()
+
+    def update(self) -> None:
+        """
+        Pass the turn if the player has no moves and find whether the game is finished, once after each change
+        of the game, because ending_condition_met() changes the turn
+        """
+        self.finished = self.game_state.ending_condition_met()
+
+    def state(self) -> dict:
+        """
+        :return: The game as a dictionary for the client, which does not change the game
+        """
+        game_state = self.game_state
+        board = game_state.board
+        rows = []
+        for row in range(board.rows):
+            line = ''
+            for column in range(board.columns):
+                color = board.get_color((row, column))
+                if color == OthelloGameLogic.BLACK:
+                    line += 'B'
+                elif color == OthelloGameLogic.WHITE:
+                    line += 'W'
+                else:
+                    line += '.'
+            rows.append(line)
+        return {
+            'board': rows,
+            'turn': 'B' if game_state.turn == OthelloGameLogic.BLACK else 'W',
+            'black': board.black_disc,
+            'white': board.white_disc,
+            'moves': sorted(game_state.possible_moves()),
+            'finished': self.finished,
+            'winner': game_state.winner,
+        }
+
+
+class GameServer:
+    def __init__(self, executor: concurrent.futures.Executor = None):
+        """
+        The server of the sessions
+        :param executor: Where the searches run, so that a long search does not stop the other sessions
+        """
+        self.executor = executor or concurrent.futures.ProcessPoolExecutor()
+        self.sessions = {}
+        self.stats = LatencyStats()
+        self._ids = itertools.count(1)
+        self._operations = {
+            'create': self._create,
+            'move': self._move,
+            'ai': self._ai,
+            'undo': self._undo,
+            'query': self._query,
+            'close': self._close,
+            'stats': self._stats,
+        }
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Answer the requests of one client until it disconnects """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        """
+        Do one request
+        :param line: The JSON of the request
+        :return: The response
+        """
+        start = time.perf_counter()
+        operation = 'invalid'
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or request.get('op') not in self._operations:
+                raise RequestError('BAD REQUEST')
+            operation = request['op']
+            response = await self._operations[operation](request)
+            response['ok'] = True
+        except RequestError as error:
+            response = {'ok': False, 'error': str(error)}
+        except (ValueError, KeyError, TypeError, OverflowError):
+            response = {'ok': False, 'error': 'BAD REQUEST'}
+        self.stats.add(operation, time.perf_counter() - start)
+        return response
+
+    def _session(self, request: dict) -> Session:
+        session = self.sessions.get(request['session'])
+        if session is None:
+            raise RequestError('NO SESSION')
+        return session
+
+    @contextlib.asynccontextmanager
+    async def _locked(self, request: dict):
+        """
+        The session of the request with its lock held, so one request of the session runs at a time
+        """
+        session = self._session(request)
+        async with session.lock:
+            if session.closed:
+                raise RequestError('NO SESSION')  # It was closed while the request waited for the lock
+            yield session
+
+    async def _create(self, request: dict) -> dict:
+        rows, columns = _integer(request, 'rows'), _integer(request, 'columns')
+        if request['rule'] not in RULES or request['starting_player'] not in COLORS or \
+                request['top_left_disc_color'] not in COLORS or \
+                request['winning_condition'] not in WINNING_CONDITIONS or rows <= 0 or columns <= 0:
+            raise RequestError('INVALID SETTINGS')
+        try:
+            game_state = GameState(request['rule'], rows, columns, request['starting_player'],
+                                   request['top_left_disc_color'], request['winning_condition'], backend=BACKEND)
+        except OddColRowNumber:
+            raise RequestError('ODD COLUMN OR ROW NUMBER')
+        session = Session(game_state)
+        response = session.state()
+        session_id = next(self._ids)
+        self.sessions[session_id] = session
+        response['session'] = session_id
+        return response
+
+    async def _move(self, request: dict) -> dict:
+        async with self._locked(request) as session:
+            try:
+                session.game_state.move((_integer(request, 'row'), _integer(request, 'column')))
+            except InvalidMoveError:
+                raise RequestError('INVALID')
+            session.update()
+            return session.state()
+
+    async def _ai(self, request: dict) -> dict:
+        async with self._locked(request) as session:
+            if session.finished:
+                raise RequestError('GAME OVER')
+            position = OthelloCodec.encode(session.game_state)
+            loop = asyncio.get_running_loop()
+            best_move, score, depth, nodes, nodes_per_second = await loop.run_in_executor(
+                self.executor, _search_position, position, _seconds(request, 'time_limit', 1.0),
+                _integer(request, 'max_depth', 64))
+
+            if request.get('play', False):
+                session.game_state.move(best_move)
+                session.update()
+            response = session.state()
+            response.update({'best_move': best_move, 'score': score, 'depth': depth,
+                             'nodes': nodes, 'nodes_per_second': nodes_per_second})
+            return response
+
+    async def _undo(self, request: dict) -> dict:
+        async with self._locked(request) as session:
+            try:
+                session.game_state.undo()
+            except NothingToUndoError:
+                raise RequestError('NOTHING TO UNDO')
+            session.update()
+            return session.state()
+
+    async def _query(self, request: dict) -> dict:
+        async with self._locked(request) as session:
+            return session.state()
+
+    async def _close(self, request: dict) -> dict:
+        async with self._locked(request) as session:  # A search or move of the session finishes first
+            session.closed = True
+            del self.sessions[request['session']]
+        return {}
+
+    async def _stats(self, request: dict) -> dict:
+        return {'sessions': len(self.sessions), 'latency': self.stats.report()}
+
+
+async def serve(game_server: GameServer, host: str, port: int, unix: str = None) -> None:
+    """ Answer clients until the task is cancelled """
+    if unix is not None:
+        server = await asyncio.start_unix_server(game_server.handle_client, path=unix)
+    else:
+        server = await asyncio.start_server(game_server.handle_client, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Othello game server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Path of a Unix socket to listen on instead of TCP')
+    parser.add_argument('--workers', type=int, default=None, help='Processes for the searches')
+    arguments = parser.parse_args()
+
+    game_server = GameServer(concurrent.futures.ProcessPoolExecutor(arguments.workers))
+    try:
+        asyncio.run(serve(game_server, arguments.host, arguments.port, arguments.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game_server.executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
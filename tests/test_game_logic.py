@@ -0,0 +1,16 @@
+import pytest
+
+from OthelloGameLogic import BACKENDS, GameState, InvalidMoveError
+
+
+def test_unknown_backend_is_an_error():
+    with pytest.raises(ValueError):
+        GameState('FULL', 8, 8, 'B', 'W', '>', backend='BITBAORD')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_moves_off_the_board_are_invalid(backend):
+    game_state = GameState('FULL', 8, 8, 'B', 'W', '>', backend=backend)
+    for move in [(1, 12), (3, -4), (-1, 3), (8, 0)]:
+        with pytest.raises(InvalidMoveError):
+            game_state.move(move)
@@ -0,0 +1,32 @@
+import random
+
+import OthelloParallel
+from OthelloGameLogic import GameState
+
+
+def _midgame(seed: int, plies: int = 16) -> GameState:
+    generator = random.Random(seed)
+    game_state = GameState('FULL', 8, 8, 'B', 'W', '>', backend='BITBOARD')
+    for _ in range(plies):
+        game_state.ending_condition_met()
+        game_state.move(generator.choice(sorted(game_state.possible_moves())))
+    return game_state
+
+
+def test_same_seed_and_node_limit_give_the_same_result():
+    game_state = _midgame(1)
+    results = []
+    for _ in range(2):
+        with OthelloParallel.ParallelSearcher(processes=3, seed=1) as searcher:
+            first = searcher.search(game_state, node_limit=30000)
+            second = searcher.search(game_state, node_limit=30000)
+        results.append([(result.best_move, result.score, result.depth, result.nodes) for result in (first, second)])
+    assert results[0] == results[1]
+    assert results[0][0] == results[0][1]
+
+
+def test_node_limit_is_kept():
+    with OthelloParallel.ParallelSearcher(processes=2, seed=0) as searcher:
+        result = searcher.search(_midgame(2), node_limit=5000)
+    assert result.depth >= 1
+    assert result.nodes <= 5000 + 64
@@ -0,0 +1,32 @@
+import random
+
+import numpy
+
+import OthelloPatterns
+from OthelloGameLogic import GameState
+
+
+def _random_game(rule: str, seed: int) -> (tuple, [tuple]):
+    settings = (rule, 6, 6, 'B', 'W', '>')
+    generator = random.Random(seed)
+    game_state = GameState(*settings)
+    moves = []
+    while not game_state.ending_condition_met():
+        move = generator.choice(sorted(game_state.possible_moves()))
+        moves.append(move)
+        game_state.move(move)
+    return settings, moves
+
+
+def test_bad_games_are_rejected_and_other_rules_left_out():
+    good = [_random_game('FULL', seed) for seed in range(10)]
+    settings, moves = good[0]
+    illegal = (settings, [(0, 0)] + moves)
+    malformed = (settings, moves[:3] + ['3,4'] + moves[3:])
+    simple = _random_game('SIMPLE', 0)
+
+    expected = OthelloPatterns.train(good, 'FULL', 6, 6, steps=10)
+    weights = OthelloPatterns.train(good[:5] + [illegal, simple, malformed] + good[5:], 'FULL', 6, 6, steps=10)
+    assert weights.rejected == 2
+    assert expected.rejected == 0
+    assert numpy.array_equal(weights.weights, expected.weights)
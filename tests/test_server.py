@@ -0,0 +1,61 @@
+import asyncio
+import concurrent.futures
+import json
+
+import server
+
+
+def _settings(**fields) -> dict:
+    request = {'op': 'create', 'rule': 'FULL', 'rows': 8, 'columns': 8, 'starting_player': 'B',
+               'top_left_disc_color': 'W', 'winning_condition': '>'}
+    request.update(fields)
+    return request
+
+
+def _run(requests: [object]) -> [dict]:
+    async def main():
+        game_server = server.GameServer(concurrent.futures.ThreadPoolExecutor(1))
+        responses = []
+        for request in requests:
+            line = request if isinstance(request, str) else json.dumps(request)
+            responses.append(await game_server.handle_line(line.encode()))
+        game_server.executor.shutdown()
+        return responses
+    return asyncio.run(main())
+
+
+def test_bad_numbers_are_bad_requests():
+    responses = _run([
+        _settings(),
+        '{"op": "move", "session": 1, "row": 1e400, "column": 3}',
+        {'op': 'move', 'session': 1, 'row': 2.0, 'column': 3},
+        {'op': 'move', 'session': 1, 'row': True, 'column': 3},
+        {'op': 'ai', 'session': 1, 'time_limit': 'soon'},
+        _settings(rows=8.5),
+        {'op': 'move', 'session': 1, 'row': 2, 'column': 3},
+    ])
+    assert responses[0]['ok']
+    assert [response.get('error') for response in responses[1:6]] == ['BAD REQUEST'] * 5
+    assert responses[6]['ok']
+
+
+def test_close_waits_for_the_request_of_the_session():
+    async def main():
+        game_server = server.GameServer(concurrent.futures.ThreadPoolExecutor(1))
+        created = await game_server.handle_line(json.dumps(_settings()).encode())
+        session = created['session']
+        search = asyncio.ensure_future(game_server.handle_line(json.dumps(
+            {'op': 'ai', 'session': session, 'time_limit': 0.2, 'max_depth': 2, 'play': True}).encode()))
+        await asyncio.sleep(0)  # The search takes the lock of the session
+        close = asyncio.ensure_future(game_server.handle_line(json.dumps({'op': 'close', 'session': session}).encode()))
+        await asyncio.sleep(0)
+        move = asyncio.ensure_future(game_server.handle_line(json.dumps(
+            {'op': 'move', 'session': session, 'row': 2, 'column': 3}).encode()))
+        results = await asyncio.gather(search, close, move)
+        game_server.executor.shutdown()
+        return results, game_server.sessions
+    (search, close, move), sessions = asyncio.run(main())
+    assert search['ok'] and search['best_move'] is not None
+    assert close['ok']
+    assert move == {'ok': False, 'error': 'NO SESSION'}
+    assert sessions == {}
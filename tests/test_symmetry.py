@@ -0,0 +1,58 @@
+import random
+import timeit
+
+import OthelloSearch
+import OthelloSymmetry
+from OthelloGameLogic import GameState
+
+
+def _positions(backend: str, count: int = 20, seed: int = 0) -> [GameState]:
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game_state = GameState('FULL', 8, 8, 'B', 'W', '>', backend=backend)
+        for _ in range(generator.randint(0, 30)):
+            if game_state.ending_condition_met():
+                break
+            game_state.move(generator.choice(sorted(game_state.possible_moves())))
+        if not game_state.ending_condition_met():
+            positions.append(game_state)
+    return positions
+
+
+def _microseconds(function, positions: [GameState]) -> float:
+    return min(timeit.repeat(lambda: [function(position) for position in positions], number=50, repeat=5)) * 1e6
+
+
+def test_cache_gives_the_moves_and_evaluation_of_every_symmetry():
+    cache = OthelloSymmetry.PositionCache()
+    for backend in ('LIST', 'COMPACT', 'BITBOARD'):
+        for game_state in _positions(backend):
+            assert cache.possible_moves(game_state) == set(game_state.possible_moves())
+            assert cache.evaluate(game_state) == OthelloSearch.evaluate(game_state)
+    assert cache.hits > 0
+
+
+def test_symmetric_position_is_a_hit():
+    game_state = GameState('FULL', 8, 8, 'B', 'W', '>')
+    cache = OthelloSymmetry.PositionCache()
+    moves = sorted(game_state.possible_moves())
+    game_state.move(moves[0])
+    cache.possible_moves(game_state)
+    game_state.undo()
+    game_state.move(moves[-1])  # The opening moves are all the same under a symmetry
+    assert cache.possible_moves(game_state) == set(game_state.possible_moves())
+    assert cache.hits == 1
+
+
+def test_cache_hit_is_cheaper_than_working_it_out():
+    for backend in ('LIST', 'BITBOARD'):
+        positions = _positions(backend)
+        cache = OthelloSymmetry.PositionCache()
+        for game_state in positions:
+            cache.evaluate(game_state)
+            cache.possible_moves(game_state)
+        assert _microseconds(cache.evaluate, positions) < _microseconds(OthelloSearch.evaluate, positions)
+
+    # The other backends keep their possible moves up to date, so only the bitboard works them out
+    assert _microseconds(cache.possible_moves, positions) < _microseconds(GameState.possible_moves, positions)